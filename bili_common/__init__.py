@@ -0,0 +1,6 @@
+# 文件: __init__.py
+"""
+两个B站监控（shit/bilibili_monitor.py 与 shit2/main.py）共用的模块：
+限速、HTTP 客户端与响应缓存、已处理视频记录、视频 ID、发送队列与摘要。
+两个脚本都从各自目录运行，启动时把仓库根目录加入 sys.path 后以 bili_common.xxx 导入。
+"""
@@ -0,0 +1,87 @@
+# 文件: digest.py
+"""
+摘要模式：把一轮（或 window 秒内）的新匹配攒起来，按关键词分组、组内按播放量排序，
+渲染成一条消息一次发出，20 个新视频只需切换一次联系人。
+per_keyword_cap 限制每组列出的条数，超出的（播放量较低的）留在缓冲里，进入下一条摘要；
+drain 只返回已列出的视频键，未列出的不会被记为已处理。
+"""
+import time
+from datetime import datetime
+
+class DigestBuffer:
+    def __init__(self, window=0, per_keyword_cap=None):
+        self.window = window
+        self.per_keyword_cap = per_keyword_cap
+        self.groups = {}      # 关键词 -> {视频键: 视频信息}，按首次出现的顺序
+        self.started = None
+
+    def __len__(self):
+        return sum(len(videos) for videos in self.groups.values())
+
+    def __contains__(self, key):
+        return any(key in videos for videos in self.groups.values())
+
+    def add(self, key, keyword, video):
+        """加入一条匹配，同一视频只收一次；返回是否为新条目"""
+        if key in self:
+            return False
+        self.groups.setdefault(keyword, {})[key] = video
+        if self.started is None:
+            self.started = time.time()
+        return True
+
+    def due(self, now=None):
+        """有内容且自第一条起已过 window 秒"""
+        if self.started is None:
+            return False
+        return (now or time.time()) - self.started >= self.window
+
+    def _select(self):
+        """每组按播放量排序取前 per_keyword_cap 个，返回 [(关键词, [(视频键, 视频信息), ...], 该组总数)]"""
+        selected = []
+        for keyword, videos in self.groups.items():
+            ranked = sorted(videos.items(), key=lambda item: item[1].get('view') or 0, reverse=True)
+            shown = ranked[:self.per_keyword_cap] if self.per_keyword_cap else ranked
+            selected.append((keyword, shown, len(ranked)))
+        return selected
+
+    def render(self, selected=None):
+        if selected is None:
+            selected = self._select()
+        count = sum(len(shown) for _, shown, _ in selected)
+        lines = [f"📋 B站新视频汇总：{count} 个（{datetime.now().strftime('%Y-%m-%d %H:%M')}）"]
+        for keyword, shown, total in selected:
+            lines.append("")
+            lines.append(f"【{keyword}】{total} 个")
+            for i, (_, video) in enumerate(shown, 1):
+                lines.append(f"{i}. {(video.get('title') or '').strip()}")
+                meta = []
+                if video.get('author'):
+                    meta.append(f"UP主: {video['author'].strip()}")
+                if isinstance(video.get('view'), int) and video['view'] > 0:
+                    meta.append(f"播放: {video['view']}")
+                if video.get('matched_keywords'):
+                    meta.append(f"命中: {'、'.join(video['matched_keywords'])}")
+                if meta:
+                    lines.append(" | ".join(meta))
+                if video.get('url'):
+                    lines.append(video['url'])
+            if len(shown) < total:
+                lines.append(f"……另有 {total - len(shown)} 个留到下一条汇总")
+        return "\n".join(lines)
+
+    def drain(self):
+        """渲染并取出已列出的视频，返回 (这些视频的键, 消息文本)；超出 per_keyword_cap 的留在缓冲里"""
+        selected = self._select()
+        message = self.render(selected)
+        keys = []
+        for keyword, shown, _ in selected:
+            videos = self.groups[keyword]
+            for key, _ in shown:
+                del videos[key]
+                keys.append(key)
+            if not videos:
+                del self.groups[keyword]
+        # 留下的视频从现在起重新计 window
+        self.started = time.time() if self.groups else None
+        return tuple(keys), message
@@ -0,0 +1,153 @@
+# 文件: history_store.py
+"""
+已处理视频记录：快照文件 + 追加写日志。
+键统一用 video_id.canonical_key 得到的整数（BV号解码为 aid，其余链接取稳定哈希），
+内存里是有序整数数组（video_id.IdSet），每个键约 16 字节，查找为二分。
+add 立即把新键追加到日志（每行 "键 时间戳"）并刷到磁盘，进程中途崩溃最多丢掉正在写的那一行；
+启动时读快照再重放日志。日志超过 compact_every 行时把全集写成新的二进制快照
+（先写临时文件再 os.replace），然后清空日志。
+设置了 ttl_days 时，启动时和每轮结束时（prune）从内存中淘汰过期的键，与日志长度无关；快照在下次压缩时更新。
+旧的 processed_videos.json、文本快照与字符串日志会在读取时自动转换；旧 JSON 损坏或为空时记一条错误，从空集开始。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from .video_id import IdSet, canonical_key
+
+SNAPSHOT_MAGIC = b'VIDS1\n'
+
+class HistoryStore:
+    """用法同 set：video in store、store.add(video)、len(store)，video 可为 BV号、链接或整数键；线程安全"""
+    def __init__(self, path='processed_videos', legacy_json='processed_videos.json',
+                 compact_every=5000, ttl_days=None, fsync=True, logger=None):
+        self.snapshot_path = path + '.snapshot'
+        self.journal_path = path + '.journal'
+        self.compact_every = compact_every
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.fsync = fsync
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.ids = IdSet()
+        self.journal_lines = 0
+
+        migrate = not os.path.exists(self.snapshot_path) and not os.path.exists(self.journal_path) \
+            and legacy_json and os.path.exists(legacy_json)
+        if migrate:
+            self._migrate(legacy_json)
+        else:
+            self._load()
+        self.prune()
+        self.journal = open(self.journal_path, 'a', encoding='utf-8', newline='\n')
+        if migrate or self.journal_lines >= self.compact_every:
+            self.compact()
+
+    def _migrate(self, legacy_json):
+        try:
+            with open(legacy_json, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            values = data.get('processed_videos', [])
+        except (OSError, ValueError, AttributeError) as e:
+            # 与旧版 load_history 一致：读不了就当没有历史，不让监控器启动失败
+            self.logger.error(f"无法读取旧的历史记录 {legacy_json}，从空记录开始: {e}")
+            return
+        self._add_strings(values, time.time())
+
+    def _add_strings(self, values, stamp):
+        """旧格式的字符串 ID；旧版 temp_ 开头的键来自进程内随机的 hash，无法还原，直接丢弃"""
+        for value in values:
+            if value and not value.startswith('temp_'):
+                self.ids.add(canonical_key(value), stamp)
+
+    def _load(self):
+        now = time.time()
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'rb') as f:
+                if f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC:
+                    self.ids = IdSet.fromfile(f)
+                else:
+                    f.seek(0)
+                    self._add_strings(f.read().decode('utf-8').split('\n'), now)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                # 崩溃时没写完的最后一行：丢弃并截掉，免得和下一条粘在一起
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(end)
+            for line in data[:end].decode('utf-8').split('\n'):
+                if not line:
+                    continue
+                key, _, stamp = line.partition(' ')
+                if stamp and key.isdigit():
+                    self.ids.add(int(key), float(stamp))
+                else:
+                    self._add_strings([line], now)
+                self.journal_lines += 1
+
+    def prune(self):
+        """淘汰超过 ttl_days 的键，返回淘汰的个数；没设 ttl_days 时不做任何事"""
+        if not self.ttl:
+            return 0
+        with self.lock:
+            return self.ids.evict_before(time.time() - self.ttl)
+
+    def _write_snapshot(self):
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            self.ids.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+    def __contains__(self, video):
+        key = canonical_key(video)
+        if key is None:
+            return False
+        # add 可能正在另一个线程（发送线程）里归并、替换数组，查找也要持锁
+        with self.lock:
+            return key in self.ids
+
+    def __len__(self):
+        with self.lock:
+            return len(self.ids)
+
+    def add(self, video):
+        """记录 video，返回是否为新记录"""
+        key = canonical_key(video)
+        if key is None:
+            raise ValueError(f"无效的视频ID: {video!r}")
+        with self.lock:
+            stamp = time.time()
+            if not self.ids.add(key, stamp):
+                return False
+            self.journal.write(f"{key} {stamp:.0f}\n")
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            self.journal_lines += 1
+            if self.journal_lines >= self.compact_every:
+                self._compact_locked()
+            return True
+
+    def _compact_locked(self):
+        if self.ttl:
+            self.ids.evict_before(time.time() - self.ttl)
+        self._write_snapshot()
+        # 快照已包含日志中的全部记录，此后才清空日志
+        self.journal.close()
+        self.journal = open(self.journal_path, 'w', encoding='utf-8', newline='\n')
+        self.journal_lines = 0
+
+    def compact(self):
+        """淘汰过期键，把全集写成新快照并清空日志"""
+        with self.lock:
+            self._compact_locked()
+
+    def close(self):
+        with self.lock:
+            self.journal.close()
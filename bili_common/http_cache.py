@@ -0,0 +1,182 @@
+# 文件: http_cache.py
+"""
+搜索请求的 HTTP 响应缓存，按 (地址, 规范化后的参数) 做键，每个键一个 JSON 文件存盘，重启后仍有效。
+仍在有效期内（Cache-Control: max-age，没有则用配置的 ttl）直接返回缓存，不发请求；
+过期后带 If-None-Match / If-Modified-Since 发条件请求，304 时沿用缓存的内容。
+响应带 no-cache 时有效期为 0，每次使用都先发条件请求；请求头带 no-cache（Cache-Control 或 Pragma）时同样跳过有效期，
+除非调用方传 revalidate=False（这些请求头只是发给上游 CDN 的，不针对本地缓存）。
+只缓存 200 且通过 cacheable 检查的响应（HTTP 200 但内容是风控/错误页的不存）；
+before_request 只在真正发请求前调用（用来排限速器）。
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+NO_CACHE_RE = re.compile(r'(?<![\w-])no-cache(?![\w-])', re.I)
+
+def _header(headers, name):
+    """不区分大小写地取请求头（调用方传入的是普通 dict）"""
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return ''
+
+def request_wants_revalidation(headers):
+    """请求头要求不用未经验证的缓存：Cache-Control: no-cache / max-age=0，或 Pragma: no-cache"""
+    cache_control = _header(headers, 'cache-control')
+    if NO_CACHE_RE.search(cache_control):
+        return True
+    m = MAX_AGE_RE.search(cache_control)
+    if m and int(m.group(1)) == 0:
+        return True
+    return not cache_control and bool(NO_CACHE_RE.search(_header(headers, 'pragma')))
+
+class CachedResponse:
+    """缓存命中时返回的对象，用法同 requests.Response 的常用部分"""
+    def __init__(self, entry, revalidated=False):
+        self.status_code = 200
+        self.text = entry['text']
+        self.url = entry['url']
+        self.headers = {}
+        self.from_cache = True
+        self.revalidated = revalidated
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        pass
+
+def cache_key(url, params=None):
+    """参数按名字排序、值统一成字符串后参与哈希，顺序不同的同一请求得到同一个键"""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+    raw = json.dumps([url, items], ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+class HttpCache:
+    def __init__(self, directory='http_cache', ttl=600, max_age_days=7):
+        self.directory = directory
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        os.makedirs(directory, exist_ok=True)
+        self.prune(max_age_days * 86400)
+        self.counts = {'hits': 0, 'revalidated': 0, 'misses': 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _load(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self.lock:
+            self.entries[key] = entry
+        return entry
+
+    def _store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+        tmp = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._path(key))
+
+    def prune(self, max_age):
+        """删除超过 max_age 秒没有更新过的缓存文件"""
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def freshness(self, headers):
+        """响应可直接复用的秒数；no-store 返回 None 表示不缓存，no-cache 为 0（每次都要验证）"""
+        cache_control = headers.get('Cache-Control', '')
+        if 'no-store' in cache_control.lower():
+            return None
+        if NO_CACHE_RE.search(cache_control):
+            return 0
+        m = MAX_AGE_RE.search(cache_control)
+        return int(m.group(1)) if m else self.ttl
+
+    @staticmethod
+    def _cacheable(response, check):
+        if check is None:
+            return True
+        try:
+            return bool(check(response))
+        except Exception:
+            return False
+
+    def get(self, session, url, params=None, headers=None, before_request=None, cacheable=None,
+            revalidate=None, **kwargs):
+        """
+        带缓存的 session.get。命中或 304 时返回 CachedResponse（from_cache=True），
+        否则返回原始的 requests.Response。
+        revalidate 为 None 时由请求头决定是否跳过有效期，True/False 则直接指定。
+        """
+        if revalidate is None:
+            revalidate = request_wants_revalidation(headers)
+        key = cache_key(url, params)
+        entry = self._load(key)
+        now = time.time()
+        if entry is not None and now - entry['stored'] < entry['fresh_for'] and not revalidate:
+            self._count('hits')
+            return CachedResponse(entry)
+
+        headers = dict(headers or {})
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        if before_request:
+            before_request()
+        response = session.get(url, params=params, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self._count('revalidated')
+            entry = dict(entry, stored=time.time())
+            # 304 没带 Cache-Control 时沿用原响应的有效期（原来是 no-cache 的仍为 0）
+            fresh_for = self.freshness(response.headers) if 'Cache-Control' in response.headers else None
+            if fresh_for is not None:
+                entry['fresh_for'] = fresh_for
+            self._store(key, entry)
+            return CachedResponse(entry, revalidated=True)
+
+        self._count('misses')
+        if response.status_code == 200 and self._cacheable(response, cacheable):
+            fresh_for = self.freshness(response.headers)
+            if fresh_for is not None:
+                self._store(key, {
+                    'url': url,
+                    'text': response.text,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'stored': time.time(),
+                    'fresh_for': fresh_for,
+                })
+        return response
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
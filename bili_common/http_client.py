@@ -0,0 +1,166 @@
+# 文件: http_client.py
+"""
+共用的 HTTP 客户端：整个监控器只有一个 requests.Session，连接池按主机划分、大小可配，
+连接用完放回池中复用，所有请求使用统一的 (连接, 读取) 超时。
+连接池换成了 urllib3 连接类的计时子类，每个请求记录 DNS 解析、TCP 连接、TLS 握手
+和首字节时间（TTFB），复用已有连接时前三项为 0，便于看出一轮里有多少时间花在建立连接上。
+"""
+import logging
+import socket
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb')
+
+# 当前线程正在进行的请求的计时记录，由 HttpClient.request 设置
+_local = threading.local()
+
+def _record(phase, seconds):
+    record = getattr(_local, 'record', None)
+    if record is not None:
+        record[phase] += seconds
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        """先自己解析域名（计入 dns），再逐个地址建立 TCP 连接（计入 connect）"""
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            # 交给 urllib3 抛出它自己的异常类型
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        _record('dns', resolved - start)
+
+        error = None
+        for _, _, _, _, sockaddr in addresses:
+            self._dns_host = sockaddr[0]
+            try:
+                sock = super()._new_conn()
+                break
+            except Exception as e:
+                error = e
+            finally:
+                # TLS 的 server_hostname 取自 host，必须还原
+                self._dns_host = host
+        else:
+            raise error
+        _record('connect', time.perf_counter() - resolved)
+        _record('new_connections', 1)
+        return sock
+
+    def getresponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().getresponse(*args, **kwargs)
+        _record('ttfb', time.perf_counter() - start)
+        return response
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        record = getattr(_local, 'record', None)
+        before = (record['dns'] + record['connect']) if record is not None else 0.0
+        start = time.perf_counter()
+        super().connect()
+        if record is not None:
+            # connect() = 解析 + TCP 连接 + TLS 握手
+            record['tls'] += time.perf_counter() - start - (record['dns'] + record['connect'] - before)
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """连接池使用计时连接类的 HTTPAdapter"""
+    POOL_CLASSES = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(self.POOL_CLASSES)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        manager = super().proxy_manager_for(*args, **kwargs)
+        manager.pool_classes_by_scheme = dict(self.POOL_CLASSES)
+        return manager
+
+class HttpClient:
+    """
+    pool_connections 为缓存的主机连接池个数，pool_maxsize 为每个主机池内保留的连接数
+    （应不小于并发搜索的线程数，否则多出的连接用完即被丢弃）；timeout 为默认的 (连接, 读取) 超时。
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=8, timeout=(5, 20), headers=None,
+                 history=1000, logger=None):
+        self.session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.timings = deque(maxlen=history)
+        self.lock = threading.Lock()
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def request(self, method, url, **kwargs):
+        """同 session.request，返回的 response 带 timing 字典（各阶段秒数、total、reused）"""
+        kwargs.setdefault('timeout', self.timeout)
+        record = {phase: 0.0 for phase in PHASES}
+        record['new_connections'] = 0
+        _local.record = record
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        finally:
+            _local.record = None
+            record['total'] = time.perf_counter() - start
+            record['url'] = url.split('?', 1)[0]
+            record['reused'] = record['new_connections'] == 0
+            with self.lock:
+                self.timings.append(record)
+        response.timing = record
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def summary(self, reset=True):
+        """汇总上次汇总以来的请求：次数、新建连接数，以及各阶段总秒数"""
+        with self.lock:
+            records = list(self.timings)
+            if reset:
+                self.timings.clear()
+        result = {'requests': len(records),
+                  'new_connections': sum(r['new_connections'] for r in records),
+                  'total': sum(r['total'] for r in records)}
+        for phase in PHASES:
+            result[phase] = sum(r[phase] for r in records)
+        return result
+
+    def log_summary(self, reset=True):
+        s = self.summary(reset)
+        if not s['requests']:
+            return s
+        setup = s['dns'] + s['connect'] + s['tls']
+        self.logger.info(
+            f"HTTP 请求 {s['requests']} 次，新建连接 {s['new_connections']} 个；"
+            f"DNS {s['dns']:.2f}s、连接 {s['connect']:.2f}s、TLS {s['tls']:.2f}s、首字节 {s['ttfb']:.2f}s，"
+            f"建立连接占总耗时 {setup / s['total'] * 100 if s['total'] else 0:.0f}%")
+        return s
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,82 @@
+# 文件: notifier.py
+"""
+发送阶段：检查循环只把待发送的视频放进有界队列，单独的发送线程按自己的节奏逐条发送，
+搜索不再被微信界面操作阻塞，一轮耗时约为 max(搜索, 发送)。
+队列满时 submit 阻塞（反压）；同一视频在发送完成前重复提交会被忽略。
+"""
+import logging
+import queue
+import threading
+import time
+
+class Notifier:
+    """
+    每条消息是一个无参函数 job，job() -> bool 执行实际发送；成功后调用 on_sent(key)。
+    interval 为两次发送之间的间隔秒数，可以是返回秒数的函数。
+    """
+    def __init__(self, on_sent=None, interval=3, maxsize=100, backlog_warn=10, logger=None):
+        self.on_sent = on_sent
+        self.interval = interval
+        self.backlog_warn = backlog_warn
+        self.logger = logger or logging.getLogger(__name__)
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.thread = threading.Thread(target=self._worker, name="notifier", daemon=True)
+        self.thread.start()
+
+    def backlog(self):
+        return self.queue.qsize()
+
+    def submit(self, key, job):
+        """排入一条待发送消息，返回是否真的入队"""
+        with self.lock:
+            if key in self.in_flight:
+                return False
+            self.in_flight.add(key)
+        self.queue.put((key, job))
+        backlog = self.queue.qsize()
+        if backlog >= self.backlog_warn:
+            self.logger.warning(f"待发送队列积压 {backlog} 条")
+        return True
+
+    def _worker(self):
+        while True:
+            key, job = self.queue.get()
+            try:
+                if job():
+                    if self.on_sent:
+                        self.on_sent(key)
+                    with self.lock:
+                        self.sent += 1
+                    self.logger.info(f"✅ 发送成功，队列剩余 {self.queue.qsize()} 条")
+                else:
+                    with self.lock:
+                        self.failed += 1
+                    self.logger.error(f"❌ 发送失败，队列剩余 {self.queue.qsize()} 条")
+            except Exception as e:
+                self.logger.error(f"发送失败: {e}")
+                with self.lock:
+                    self.failed += 1
+            finally:
+                with self.lock:
+                    self.in_flight.discard(key)
+                self.queue.task_done()
+            # 发送间隔
+            time.sleep(self.interval() if callable(self.interval) else self.interval)
+
+    def join(self):
+        """等待队列里的消息全部发送完"""
+        backlog = self.queue.qsize()
+        if backlog:
+            self.logger.info(f"等待发送队列清空，剩余 {backlog} 条")
+        self.queue.join()
+
+    def pop_counts(self):
+        """返回并清零上次调用以来的 (成功数, 失败数)"""
+        with self.lock:
+            counts = (self.sent, self.failed)
+            self.sent = self.failed = 0
+        return counts
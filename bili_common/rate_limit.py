@@ -0,0 +1,48 @@
+# 文件: rate_limit.py
+"""
+全局请求限速：每个主机一个令牌桶，平均每秒放行 rate 个请求、最多连续 capacity 个，
+所有搜索线程共用同一个 HostRateLimiter，并发搜索也不会超过设定的请求频率。
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+class TokenBucket:
+    """令牌桶：平均每秒放行 rate 个请求，最多允许连续 capacity 个"""
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，没有则阻塞等待，返回等待的秒数"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+class HostRateLimiter:
+    """按主机分别限速的令牌桶集合，所有搜索线程共用一个实例"""
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlsplit(url).hostname or url
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        return bucket.acquire()
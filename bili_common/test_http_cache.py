@@ -0,0 +1,98 @@
+# 文件: test_http_cache.py
+"""HttpCache 的有效期与条件请求（用假的 session，不联网）"""
+import ast
+import os
+import tempfile
+import unittest
+
+from bili_common.http_cache import HttpCache
+
+MONITOR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shit', 'bilibili_monitor.py')
+
+def stealth_headers():
+    """取 bilibili_monitor 里 get_stealth_headers 返回的字典字面量（导入监控器需要 pyautogui 等，这里直接读源码）"""
+    with open(MONITOR_PATH, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) and node.name == 'get_stealth_headers':
+            returned = next(n for n in ast.walk(node) if isinstance(n, ast.Return))
+            return ast.literal_eval(returned.value)
+    raise LookupError('get_stealth_headers not found')
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+class FakeSession:
+    """带 If-None-Match 且 ETag 相同时回 304，否则回 200 + response_headers"""
+    def __init__(self, response_headers):
+        self.response_headers = response_headers
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, 'page', dict(self.response_headers, ETag='"v1"'))
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(self.tmp.name, ttl=600)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_max_age_response_is_served_without_request(self):
+        session = FakeSession({'Cache-Control': 'max-age=600'})
+        self.cache.get(session, 'https://example.com/s', params={'k': 1})
+        response = self.cache.get(session, 'https://example.com/s', params={'k': 1})
+        self.assertTrue(response.from_cache)
+        self.assertFalse(response.revalidated)
+        self.assertEqual(len(session.requests), 1)
+
+    def test_no_cache_response_is_revalidated_on_every_use(self):
+        session = FakeSession({'Cache-Control': 'no-cache'})
+        self.cache.get(session, 'https://example.com/s', params={'k': 1})
+        for _ in range(2):
+            # 第二次之后的 304 没带 Cache-Control，仍按原响应的 no-cache 处理
+            response = self.cache.get(session, 'https://example.com/s', params={'k': 1})
+            self.assertTrue(response.revalidated)
+            self.assertEqual(response.text, 'page')
+            self.assertEqual(session.requests[-1].get('If-None-Match'), '"v1"')
+        self.assertEqual(len(session.requests), 3)
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'revalidated': 2, 'misses': 1})
+
+    def test_no_cache_request_header_skips_fresh_entry(self):
+        session = FakeSession({'Cache-Control': 'max-age=600'})
+        self.cache.get(session, 'https://example.com/s', params={'k': 1})
+        for headers in ({'Cache-Control': 'no-cache'}, {'pragma': 'no-cache'}):
+            response = self.cache.get(session, 'https://example.com/s', params={'k': 1}, headers=headers)
+            self.assertTrue(response.revalidated)
+            self.assertEqual(session.requests[-1].get('If-None-Match'), '"v1"')
+        self.assertEqual(len(session.requests), 3)
+
+    def test_stealth_search_headers_still_hit_with_revalidate_false(self):
+        # 请求头里的 no-cache/Pragma 是给 CDN 的，不能让本地缓存失效
+        session = FakeSession({})
+        headers = stealth_headers()
+        self.assertEqual(headers.get('Pragma'), 'no-cache')
+        for _ in range(3):
+            response = self.cache.get(session, 'https://search.bilibili.com/all', params={'keyword': 'k'},
+                                      headers=headers, revalidate=False)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(session.requests[0].get('Cache-Control'), 'no-cache')
+        self.assertEqual(self.cache.stats(), {'hits': 2, 'revalidated': 0, 'misses': 1})
+
+    def test_no_store_response_is_not_cached(self):
+        session = FakeSession({'Cache-Control': 'no-store'})
+        self.cache.get(session, 'https://example.com/s')
+        response = self.cache.get(session, 'https://example.com/s')
+        self.assertFalse(getattr(response, 'from_cache', False))
+        self.assertNotIn('If-None-Match', session.requests[-1])
+
+if __name__ == '__main__':
+    unittest.main()
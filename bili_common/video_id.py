@@ -0,0 +1,174 @@
+# 文件: video_id.py
+"""
+视频身份：把 BV 号、av 号和视频链接统一成一个整数键。
+BV 号解码为数字 aid（< 2^51）；认不出视频号的链接规范化后取 blake2b 的 8 字节摘要并置第 62 位，
+与 aid 不会冲突，且跨进程稳定（不像内置 hash 每次启动都变）。
+IdSet 把这些整数存在有序的 array('q') 中，每个键另记一个时间戳，支持按时间淘汰。
+"""
+import hashlib
+import re
+from array import array
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+XOR_CODE = 23442827791579
+MASK_CODE = 2251799813685247
+MAX_AID = 1 << 51
+BASE = 58
+ALPHABET = "FcwAPNKTMug3GV5Lj7EJnHpWsx4tb8haYeviqBz6rkCy12mUSDQX9RdoZf"
+ALPHABET_INDEX = {c: i for i, c in enumerate(ALPHABET)}
+URL_KEY_BIT = 1 << 62
+
+BVID_RE = re.compile(r'(?<![0-9A-Za-z])[Bb][Vv](1[0-9A-Za-z]{9})(?![0-9A-Za-z])')
+AID_RE = re.compile(r'(?:(?<![0-9A-Za-z])av|[?&]aid=)(\d+)', re.I)
+
+def _swap(chars):
+    chars[3], chars[9] = chars[9], chars[3]
+    chars[4], chars[7] = chars[7], chars[4]
+
+def bv_to_av(bvid):
+    """BV号 -> aid；格式不对时抛 ValueError"""
+    m = BVID_RE.fullmatch(bvid)
+    if not m:
+        raise ValueError(f"无效的BV号: {bvid!r}")
+    chars = list("BV" + m.group(1))
+    _swap(chars)
+    tmp = 0
+    for c in chars[3:]:
+        index = ALPHABET_INDEX.get(c)
+        if index is None:
+            raise ValueError(f"无效的BV号: {bvid!r}")
+        tmp = tmp * BASE + index
+    return (tmp & MASK_CODE) ^ XOR_CODE
+
+def av_to_bv(aid):
+    """aid -> BV号"""
+    if not 0 < aid < MAX_AID:
+        raise ValueError(f"aid 超出范围: {aid}")
+    chars = list("BV1000000000")
+    i = len(chars) - 1
+    tmp = (MAX_AID | aid) ^ XOR_CODE
+    while tmp:
+        chars[i] = ALPHABET[tmp % BASE]
+        tmp //= BASE
+        i -= 1
+    _swap(chars)
+    return "".join(chars)
+
+def url_key(url):
+    """规范化链接（去掉协议、查询串、片段和末尾的 /，主机名小写）后的稳定哈希键"""
+    parts = urlsplit(url if "//" in url else "//" + url)
+    normalized = (parts.netloc.lower() + parts.path.rstrip("/")).encode("utf-8")
+    digest = int.from_bytes(hashlib.blake2b(normalized, digest_size=8).digest(), "big")
+    return URL_KEY_BIT | (digest & (URL_KEY_BIT - 1))
+
+def canonical_key(value):
+    """
+    BV号、av号、视频链接或整数 aid -> 整数键；空值返回 None。
+    能认出视频号的一律得到 aid，同一视频不论以哪种形式出现都是同一个键。
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    m = BVID_RE.search(value)
+    if m:
+        try:
+            return bv_to_av("BV" + m.group(1))
+        except ValueError:
+            pass
+    m = AID_RE.search(value)
+    if m and 0 < int(m.group(1)) < MAX_AID:
+        return int(m.group(1))
+    return url_key(value)
+
+def video_key(video):
+    """视频信息 dict -> 整数键：依次看 aid、合法的 bvid、url，最后才对 bvid 原文取哈希"""
+    aid = video.get("aid")
+    if aid:
+        return int(aid)
+    bvid = video.get("bvid") or ""
+    if BVID_RE.fullmatch(bvid):
+        try:
+            return bv_to_av(bvid)
+        except ValueError:
+            pass
+    return canonical_key(video.get("url")) or canonical_key(bvid)
+
+class IdSet:
+    """
+    整数键集合：主体为有序 array('q')（每键 8 字节）加平行的 array('d') 时间戳，二分查找；
+    新键先进小字典，攒够 merge_every 个再归并进数组。
+    不是线程安全的：归并会替换数组，多线程使用时由调用方加锁（见 HistoryStore）。
+    """
+    def __init__(self, merge_every=1024):
+        self.keys = array('q')
+        self.stamps = array('d')
+        self.pending = {}
+        self.merge_every = merge_every
+
+    def __len__(self):
+        return len(self.keys) + len(self.pending)
+
+    def __contains__(self, key):
+        if key in self.pending:
+            return True
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def __iter__(self):
+        self.merge()
+        return iter(self.keys)
+
+    def add(self, key, stamp):
+        """加入 key，返回是否为新键"""
+        if key in self:
+            return False
+        self.pending[key] = stamp
+        if len(self.pending) >= self.merge_every:
+            self.merge()
+        return True
+
+    def merge(self):
+        if not self.pending:
+            return
+        items = sorted(list(zip(self.keys, self.stamps)) + list(self.pending.items()))
+        self.keys = array('q', (k for k, _ in items))
+        self.stamps = array('d', (s for _, s in items))
+        self.pending = {}
+
+    def evict_before(self, cutoff):
+        """去掉时间戳早于 cutoff 的键，返回去掉的个数"""
+        self.merge()
+        # 每轮都会调用，大多数时候没有过期的键，先用 min 快速排除
+        if not self.stamps or min(self.stamps) >= cutoff:
+            return 0
+        keep = [i for i, s in enumerate(self.stamps) if s >= cutoff]
+        removed = len(self.keys) - len(keep)
+        if removed:
+            self.keys = array('q', (self.keys[i] for i in keep))
+            self.stamps = array('d', (self.stamps[i] for i in keep))
+        return removed
+
+    def items(self):
+        self.merge()
+        return zip(self.keys, self.stamps)
+
+    def tofile(self, f):
+        """二进制写出：键个数（8 字节）+ 键数组 + 时间戳数组"""
+        self.merge()
+        array('q', [len(self.keys)]).tofile(f)
+        self.keys.tofile(f)
+        self.stamps.tofile(f)
+
+    @classmethod
+    def fromfile(cls, f, merge_every=1024):
+        ids = cls(merge_every)
+        header = array('q')
+        header.fromfile(f, 1)
+        ids.keys.fromfile(f, header[0])
+        ids.stamps.fromfile(f, header[0])
+        return ids
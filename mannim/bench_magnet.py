@@ -0,0 +1,79 @@
+# 文件: bench_magnet.py
+"""
+MagnetInsideCoil 渲染基准：以低画质、不写视频的方式无界面渲染若干种网格尺寸，
+打开逐帧计时，输出各阶段 p50/p95/max 与总耗时，便于比较优化前后的数据。
+
+用法示例：
+    python bench_magnet.py                      # 默认网格 5 8 12 15
+    python bench_magnet.py --sizes 5 10 20 --seconds 2 --no-table --json before.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCENE_FILE = os.path.join(HERE, "magnet_damped_field.py")
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+def bench_size(n, seconds, use_table, media_dir):
+    """渲染一次 n × n × n 网格，返回计时汇总"""
+    from manim import tempconfig
+    import magnet_damped_field as mdf
+
+    mdf.set_params(NX=n, NY=n, NZ=n, t_total=seconds, PROFILE_FRAMES=True,
+                   USE_FIELD_TABLE=use_table, FIELD_CACHE_DIR=None)
+    options = {
+        "quality": "low_quality",
+        "input_file": SCENE_FILE,
+        "media_dir": media_dir,
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }
+    with tempconfig(options):
+        scene = mdf.MagnetInsideCoil()
+        start = time.perf_counter()
+        scene.render()
+        wall = time.perf_counter() - start
+    profiler = scene.profiler
+    return {
+        "grid": n,
+        "frames": len(profiler.frames),
+        "wall_s": wall,
+        "setup_ms": {k: v * 1000.0 for k, v in profiler.setup.items()},
+        "phases_ms": profiler.summary(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="MagnetInsideCoil 渲染基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 8, 12, 15],
+                        help="网格尺寸 NX=NY=NZ")
+    parser.add_argument("--seconds", type=float, default=2.0, help="每次渲染的场景时长")
+    parser.add_argument("--no-table", action="store_true", help="关闭逐帧查表，逐帧计算磁场")
+    parser.add_argument("--json", help="把结果另存为 JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as media_dir:
+        for n in args.sizes:
+            res = bench_size(n, args.seconds, not args.no_table, media_dir)
+            results.append(res)
+            ph = res["phases_ms"]
+            print(f"网格 {n:>3}^3  帧数 {res['frames']:>4}  总耗时 {res['wall_s']:.2f}s")
+            for name, st in ph.items():
+                print(f"    {name:<10} p50 {st['p50']:8.3f}  p95 {st['p95']:8.3f}  max {st['max']:8.3f} ms")
+            for name, ms in res["setup_ms"].items():
+                print(f"    [准备] {name}: {ms:.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# 文件: coil_emf.py
+"""
+线圈感应电动势：把线圈看作沿 z 轴均匀分布的 N 匝圆环，
+默认磁铁按 z 轴点偶极子处理，穿过半径为 a 的一匝的磁通有解析式
+    Φ = (mu0/4π) · 2π m a² / (a² + d²)^(3/2)，d 为该匝到磁铁的轴向距离。
+给定 field_rz（如圆柱磁铁的磁场）时，先在 d 的网格上对一匝的圆盘积分 B_z 得到单匝磁通表，
+之后按 d 插值。所有匝、所有时刻一次向量化求和（按时间分块以控制内存），匝的位置只算一次。
+"""
+import numpy as np
+
+class CoilModel:
+    """N 匝线圈：匝均匀分布在 [-length/2, length/2]，半径 radius，总电阻 resistance"""
+    def __init__(self, n_turns, length, radius, resistance=1.0, mu0_4pi=1.0, chunk_size=4096,
+                 field_rz=None, dz_max=None, radial_breaks=(), n_radial=32, n_profile=2049):
+        self.n_turns = n_turns
+        self.turn_z = np.linspace(-length / 2, length / 2, n_turns)  # 缓存的每匝几何
+        self.a2 = radius * radius
+        self.resistance = resistance
+        self.mu0_4pi = mu0_4pi
+        self.chunk_size = chunk_size
+        # field_rz: (rho, dz) -> (B_rho, B_z)，已含磁矩；此时 flux 等忽略 moment 参数
+        self.profile = None
+        if field_rz is not None:
+            self.profile = self._turn_flux_profile(field_rz, radius, dz_max or length,
+                                                   radial_breaks, n_radial, n_profile)
+
+    @staticmethod
+    def _turn_flux_profile(field_rz, radius, dz_max, radial_breaks, n_radial, n_profile):
+        """
+        单匝磁通 Φ1(d) = ∫ B_z 2πρ dρ 及其导数，d ∈ [-dz_max, dz_max]。
+        径向分段做 Gauss-Legendre，分段点取 radial_breaks（B_z 在磁铁侧面处有跳变，应在此分段）
+        """
+        x, w = np.polynomial.legendre.leggauss(n_radial)
+        edges = [0.0] + sorted(b for b in radial_breaks if 0 < b < radius) + [radius]
+        rho, weights = [], []
+        for lo, hi in zip(edges[:-1], edges[1:]):
+            r = lo + (hi - lo) * (x + 1) / 2
+            rho.append(r)
+            weights.append(np.pi * (hi - lo) * w * r)  # 2πρ · (hi - lo)/2 · w
+        rho = np.concatenate(rho)
+        weights = np.concatenate(weights)
+        d = np.linspace(-dz_max, dz_max, n_profile)
+        _, B_z = field_rz(rho[None, :], d[:, None])
+        flux = B_z @ weights
+        return d, flux, np.gradient(flux, d)
+
+    def _sum_over_turns(self, zt, kernel):
+        zt = np.atleast_1d(np.asarray(zt, dtype=float))
+        out = np.empty_like(zt)
+        for start in range(0, len(zt), self.chunk_size):
+            dz = self.turn_z[None, :] - zt[start:start + self.chunk_size, None]
+            out[start:start + self.chunk_size] = kernel(dz).sum(axis=1)
+        return out
+
+    def flux(self, zt, moment):
+        """磁铁位于 zt (T,) 时穿过全部匝的总磁通 (T,)"""
+        if self.profile is not None:
+            d, flux, _ = self.profile
+            return self._sum_over_turns(zt, lambda dz: np.interp(dz, d, flux, left=0.0, right=0.0))
+        c = 2 * np.pi * self.mu0_4pi * moment * self.a2
+        return c * self._sum_over_turns(zt, lambda dz: (self.a2 + dz * dz) ** -1.5)
+
+    def flux_gradient(self, zt, moment):
+        """总磁通对磁铁位置的导数 dΦ/dzt (T,)"""
+        if self.profile is not None:
+            # dz = 匝位置 - zt，故 dΦ/dzt = -Σ Φ1'(dz)
+            d, _, slope = self.profile
+            return -self._sum_over_turns(zt, lambda dz: np.interp(dz, d, slope, left=0.0, right=0.0))
+        c = 6 * np.pi * self.mu0_4pi * moment * self.a2
+        return c * self._sum_over_turns(zt, lambda dz: dz * (self.a2 + dz * dz) ** -2.5)
+
+    def evaluate(self, zt, vt, moment):
+        """
+        给定磁铁位置 zt 与速度 vt（形状 (T,)），返回字典：
+        flux 总磁通、emf 感应电动势 -dΦ/dt、current 线圈电流、force 作用在磁铁上的电磁阻尼力
+        """
+        vt = np.atleast_1d(np.asarray(vt, dtype=float))
+        grad = self.flux_gradient(zt, moment)
+        emf = -grad * vt
+        current = emf / self.resistance
+        return {
+            "flux": self.flux(zt, moment),
+            "emf": emf,
+            "current": current,
+            "force": current * grad,  # = -(dΦ/dz)² v / R，总与运动方向相反
+        }
@@ -0,0 +1,148 @@
+# 文件: field_lines.py
+"""
+批量磁力线（流线）追踪：所有磁力线在 NumPy 数组上同时用 RK4 推进，
+碰到磁铁或离开边界的线停止，其余的继续。FieldLineTracer 负责逐帧更新，
+场只随磁铁平移时复用磁铁坐标系下追踪好的线。
+"""
+import numpy as np
+
+def seed_points_around(center, n_lines, radius, offset):
+    """在磁铁北极（center 上方 offset 处）半径为 radius 的圆环上均匀布置种子点"""
+    phi = np.linspace(0.0, 2 * np.pi, n_lines, endpoint=False)
+    seeds = np.zeros((n_lines, 3))
+    seeds[:, 0] = radius * np.cos(phi)
+    seeds[:, 1] = radius * np.sin(phi)
+    seeds[:, 2] = offset
+    return seeds + np.asarray(center, dtype=float)
+
+def trace_field_lines(seeds, field_fn, step, max_steps, bounds, stop_center=None,
+                      stop_radius=0.0, direction=1.0, step_limits=None):
+    """
+    从 seeds (S,3) 出发沿 direction · B/|B| 按弧长积分（RK4，步长 step），所有线一起推进。
+    field_fn(points (M,3)) -> B (M,3)；bounds 为 (lo (3,), hi (3,))。
+    线在离开边界、进入以 stop_center 为心 stop_radius 为半径的球（磁铁）、
+    磁场过弱或用完 step_limits（每条线各自的步数上限）时停止。
+    返回 (points, lengths)：points 形状 (S,L,3)，第 s 条线的前 lengths[s] 个点有效，
+    其后的点重复最后一个有效点。
+    """
+    seeds = np.asarray(seeds, dtype=float)
+    n = len(seeds)
+    lo, hi = (np.asarray(b, dtype=float) for b in bounds)
+    limits = np.full(n, max_steps) if step_limits is None else np.minimum(step_limits, max_steps)
+
+    def unit_field(p):
+        B = field_fn(p)
+        norm = np.linalg.norm(B, axis=1)
+        unit = np.zeros_like(B)
+        np.divide(B, norm[:, None], out=unit, where=norm[:, None] > 1e-12)
+        return direction * unit, norm
+
+    points = np.empty((n, max_steps + 1, 3))
+    points[:, 0] = seeds
+    lengths = np.ones(n, dtype=int)
+    active = limits > 0
+    current = seeds.copy()
+    for i in range(max_steps):
+        idx = np.nonzero(active)[0]
+        if len(idx) == 0:
+            break
+        p = current[idx]
+        k1, norm = unit_field(p)
+        k2, _ = unit_field(p + 0.5 * step * k1)
+        k3, _ = unit_field(p + 0.5 * step * k2)
+        k4, _ = unit_field(p + step * k3)
+        new = p + (step / 6.0) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+        current[idx] = new
+        points[idx, i + 1] = new
+        lengths[idx] = i + 2
+
+        done = np.any(new < lo, axis=1) | np.any(new > hi, axis=1) | (norm < 1e-9)
+        if stop_center is not None:
+            done |= np.linalg.norm(new - stop_center, axis=1) < stop_radius
+        done |= (i + 1) >= limits[idx]
+        active[idx[done]] = False
+
+    used = int(lengths.max())
+    points = points[:, :used]
+    # 失效部分用最后一个有效点填充，便于后续整体处理
+    last = points[np.arange(n), lengths - 1]
+    tail = np.arange(used)[None, :] >= lengths[:, None]
+    points[tail] = np.repeat(last, used - lengths, axis=0)
+    return points, lengths
+
+def clip_to_bounds(points, lengths, bounds):
+    """
+    把 points (S,L,3) 中每条线截断到第一个越出 bounds 的点（含该点，与 trace_field_lines 的停止规则一致，
+    起点不检查），返回新的 lengths
+    """
+    lo, hi = (np.asarray(b, dtype=float) for b in bounds)
+    out = np.any(points < lo, axis=2) | np.any(points > hi, axis=2)
+    out[:, 0] = False
+    first = np.where(out.any(axis=1), out.argmax(axis=1) + 1, points.shape[1])
+    return np.minimum(lengths, first)
+
+def join_directions(fwd, fwd_len, bwd, bwd_len):
+    """反向段倒序后接上正向段（种子点只保留一次），返回 (lines, lengths)"""
+    n = len(fwd)
+    nb = bwd.shape[1]
+    rev_idx = np.clip(bwd_len[:, None] - 1 - np.arange(nb)[None, :], 0, None)
+    bwd_rev = np.take_along_axis(bwd, rev_idx[:, :, None], axis=1)
+    lines = np.concatenate([bwd_rev, np.zeros_like(fwd[:, 1:])], axis=1)
+    lengths = bwd_len + fwd_len - 1
+    # 正向段紧接在每条线自己的反向段之后
+    rows = np.repeat(np.arange(n), fwd.shape[1] - 1)
+    cols = (bwd_len[:, None] + np.arange(fwd.shape[1] - 1)[None, :]).reshape(-1)
+    lines[rows, cols] = fwd[:, 1:].reshape(-1, 3)
+    # 有效点之后重复最后一个点
+    last = lines[np.arange(n), lengths - 1]
+    tail = np.arange(lines.shape[1])[None, :] >= lengths[:, None]
+    lines[tail] = np.repeat(last, lines.shape[1] - lengths, axis=0)
+    return lines, lengths
+
+class FieldLineTracer:
+    """
+    逐帧追踪磁力线（沿正反两个方向）。
+    rigid=True 表示场只随 center 整体平移（只有运动磁铁时）：第一帧在磁铁坐标系里追踪一次，
+    边界按 center_range（center 可能到达的范围）放大，之后每帧只把这些线平移到当前 center
+    再按实际边界截断，结果与逐帧完整追踪相同。有固定的附加磁铁等非刚性场时每帧完整追踪。
+    """
+    def __init__(self, n_lines, seed_radius, seed_offset, step, max_steps, bounds,
+                 stop_radius, center_range=None):
+        self.n_lines = n_lines
+        self.seed_radius = seed_radius
+        self.seed_offset = seed_offset
+        self.step = step
+        self.max_steps = max_steps
+        self.bounds = tuple(np.asarray(b, dtype=float) for b in bounds)
+        self.stop_radius = stop_radius
+        # 默认 center 可以在边界内任意位置
+        self.center_range = tuple(np.asarray(b, dtype=float) for b in (center_range or bounds))
+        self.relative = None
+
+    def _trace(self, field_fn, center, bounds):
+        """从 center 处的种子点沿正反两个方向追踪，返回 (fwd, fwd_len, bwd, bwd_len)"""
+        seeds = seed_points_around(center, self.n_lines, self.seed_radius, self.seed_offset)
+        kwargs = dict(step=self.step, max_steps=self.max_steps, bounds=bounds,
+                      stop_center=center, stop_radius=self.stop_radius)
+        fwd, fwd_len = trace_field_lines(seeds, field_fn, direction=1.0, **kwargs)
+        bwd, bwd_len = trace_field_lines(seeds, field_fn, direction=-1.0, **kwargs)
+        return fwd, fwd_len, bwd, bwd_len
+
+    def update(self, field_fn, center, rigid=False):
+        """返回本帧的磁力线 (lines, lengths)，每条线由反向段与正向段拼接而成"""
+        center = np.asarray(center, dtype=float)
+        if not rigid:
+            return join_directions(*self._trace(field_fn, center, self.bounds))
+
+        if self.relative is None:
+            # 磁铁坐标系下的边界：覆盖 center 在 center_range 内任意位置时的实际边界
+            lo, hi = self.bounds
+            c_lo, c_hi = self.center_range
+            self.relative = self._trace(lambda p: field_fn(p + center), np.zeros(3),
+                                        (lo - c_hi, hi - c_lo))
+        fwd, fwd_len, bwd, bwd_len = self.relative
+        fwd = fwd + center
+        bwd = bwd + center
+        return join_directions(fwd, clip_to_bounds(fwd, fwd_len, self.bounds),
+                               bwd, clip_to_bounds(bwd, bwd_len, self.bounds))
@@ -1,6 +1,19 @@
 # 文件: magnet_inside_coil.py
 from manim import *
 import numpy as np
+import hashlib
+import heapq
+import os
+import subprocess
+import time
+from contextlib import contextmanager, nullcontext
+
+from coil_emf import CoilModel
+from cylinder_field import CylinderFieldTable, cylinder_B_rz
+from field_lines import FieldLineTracer
+from field_sources import FieldSources
+from magnet_trajectory import integrate_batch
+from sim_export import SimulationRecorder
 
 # ---------- 参数（可调） ----------
 L_coil = 4.0           # 线圈总长
@@ -15,26 +28,103 @@ z_eq = 0.0             # 平衡位置（线圈中心）
 t_total = 8.0
 dipole_magnitude = 1.0
 
+# 线圈电路：匝数与总电阻（用于感应电动势与阻尼力）
+N_turns = 200
+R_circuit = 1.0
+
+# 轨迹后端："analytic" 线性阻尼解析解；"ode" 数值积分（涡流阻尼 + 硬墙反射）
+TRAJECTORY_BACKEND = "analytic"
+c_eddy = 0.0           # 线圈内附加的涡流阻尼系数（仅 ode 后端）
+restitution = 0.8      # 碰到 z_min/z_max 时的恢复系数（仅 ode 后端）
+
 # 箭头采样密度（越高越慢）
 NX, NY, NZ = 5, 5, 5
+# 磁场的画法："arrows" 箭头网格；"lines" 磁力线；"both" 两者都画
+FIELD_DISPLAY = "arrows"
+FIELD_LINE_COUNT = 24
+FIELD_LINE_STEP = 0.04
+FIELD_LINE_MAX_STEPS = 250
+
+# 采样方式："grid" 均匀网格；"adaptive" 按磁场梯度在磁铁运动范围附近八叉树加密
+SAMPLING_MODE = "grid"
+ARROW_BUDGET = 125     # adaptive 模式下箭头数量上限
 ARROW_SCALE = 0.35
 MIN_ARROW_LEN = 0.02
+# 箭头按深度与磁铁、线圈互相遮挡：每个箭头单独作为一个 3D 着色的 mobject 参与相机的深度排序（较慢）；
+# 关闭时箭头按颜色合并成少数几个 mobject，总是画在三维曲面之前
+ARROW_DEPTH_SORT = False
 
 # 磁铁几何（必须小于 R_coil_inner）
 mag_radius = 0.18
 mag_height = 0.5
 
+# 磁场模型："dipole" 点偶极子；"cylinder" 有限尺寸均匀磁化圆柱（椭圆积分，渲染时查表插值）
+FIELD_MODEL = "dipole"
+
+# 固定不动的附加磁铁（点偶极子），例如对置磁铁演示：[((0, 0, -1.5), (0, 0, -1.0))]
+# 每项为 (位置, 磁矩)，与运动磁铁的磁场叠加
+EXTRA_MAGNETS = []
+
+# 在 3D 视图旁画感应电动势随时间变化的实时曲线（磁通按 FIELD_MODEL 计算，与画出的磁场一致）
+EMF_PLOT = False
+
+# 利用轴对称性：同一圆环上的箭头只计算一次磁场
+USE_AXISYMMETRY = True
+
+# 逐帧计时：记录各阶段耗时并在渲染结束后输出汇总
+PROFILE_FRAMES = False
+
+# 静态背景缓存：相机分段固定，每个相机姿态下坐标轴、线圈、标记只栅格化一次，
+# 之后每帧只在缓存的背景图上叠加磁铁与箭头（代价是运动物体总是画在背景之上）
+BACKGROUND_CACHE = False
+CAMERA_POSES = 8       # 分段数（1 表示全程固定相机）
+CAMERA_ROTATION_RATE = 0.12
+
+# 模拟数据导出：渲染时把每帧的 t、z(t) 与箭头处的磁场分块写入压缩 .npz（用 sim_export.load_simulation 读取）
+EXPORT_SIM_DATA = False
+EXPORT_DIR = os.path.join("media", "sim_data")
+EXPORT_CHUNK_FRAMES = 256
+
+# 流式导出：原始帧直接通过管道送入单个 ffmpeg 编码进程（不生成分段视频、无需最后拼接）
+STREAM_FRAMES = False
+FFMPEG_BINARY = "ffmpeg"
+STREAM_CRF = 18
+
+# 逐帧磁场查表：预先算好每帧的 z(t) 与箭头数据，渲染时只查表
+USE_FIELD_TABLE = True
+FIELD_CACHE_DIR = os.path.join("media", "field_cache")  # None 表示只在内存中预计算
+
 # ---------- 物理与限制 ----------
-omega0 = np.sqrt(k_spring / m_mag)
-zeta = c_damp / (2 * np.sqrt(k_spring * m_mag))
-if zeta < 1:
-    omega_d = omega0 * np.sqrt(1 - zeta**2)
-else:
-    omega_d = 0.0
+def update_derived_params():
+    """由上面的参数计算派生量（修改参数后需重新调用）"""
+    global omega0, zeta, omega_d, z_min, z_max
+    omega0 = np.sqrt(k_spring / m_mag)
+    zeta = c_damp / (2 * np.sqrt(k_spring * m_mag))
+    if zeta < 1:
+        omega_d = omega0 * np.sqrt(1 - zeta**2)
+    else:
+        omega_d = 0.0
+
+    # 允许磁铁运动范围（在内腔内沿轴运动）
+    z_min = - (L_coil/2 - mag_height/2 - 0.02)  # 留点余量防止碰壁
+    z_max =   (L_coil/2 - mag_height/2 - 0.02)
+
+    # 参数变了，数值轨迹、圆柱磁场表与附加磁铁的源集合需要重新计算
+    global _ode_trajectory, _cylinder_table, _extra_sources
+    _ode_trajectory = None
+    _cylinder_table = None
+    _extra_sources = None
+
+update_derived_params()
 
-# 允许磁铁运动范围（在内腔内沿轴运动）
-z_min = - (L_coil/2 - mag_height/2 - 0.02)  # 留点余量防止碰壁
-z_max =   (L_coil/2 - mag_height/2 - 0.02)
+def set_params(**overrides):
+    """批量修改模块级参数（供参数扫描等脚本使用），并重新计算派生量"""
+    g = globals()
+    for name, value in overrides.items():
+        if name.startswith("_") or name not in g or callable(g[name]):
+            raise KeyError(f"未知参数: {name}")
+        g[name] = value
+    update_derived_params()
 
 def z_of_t_raw(t):
     """欠阻尼解析解（不做边界限制）"""
@@ -43,8 +133,35 @@ def z_of_t_raw(t):
     else:
         return A0 * np.exp(-c_damp / (2*m_mag) * t) + z_eq
 
+def ode_trajectory():
+    """按当前参数数值积分一次（结果缓存），初始条件与解析解在 t=0 处一致"""
+    global _ode_trajectory
+    if _ode_trajectory is None:
+        h = 1e-6
+        z0 = z_of_t_raw(0.0)
+        v0 = (z_of_t_raw(h) - z_of_t_raw(-h)) / (2 * h)
+        _ode_trajectory = integrate_batch(
+            [np.clip(z0, z_min, z_max)], [v0], t_total + 1.0,
+            k_spring=k_spring, m_mag=m_mag, c_damp=c_damp, z_eq=z_eq, L_coil=L_coil,
+            z_min=z_min, z_max=z_max, c_eddy=c_eddy, restitution=restitution)
+    return _ode_trajectory
+
+def z_of_t_array(times):
+    """批量求多个时刻的位置（已限制在边界内）"""
+    if TRAJECTORY_BACKEND == "ode":
+        return ode_trajectory()(np.asarray(times, dtype=float))
+    return np.clip(z_of_t_raw(np.asarray(times, dtype=float)), z_min, z_max)
+
+def v_of_t_array(times, h=1e-5):
+    """批量求多个时刻的速度（对 z_of_t_array 做中心差分，两种轨迹后端通用）"""
+    times = np.asarray(times, dtype=float)
+    return (z_of_t_array(times + h) - z_of_t_array(times - h)) / (2 * h)
+
 def z_of_t(t):
     """在边界内强制约束位置，避免穿墙（优先安全性）"""
+    if TRAJECTORY_BACKEND == "ode":
+        # 数值后端用硬墙反射保证在边界内
+        return ode_trajectory()(t)
     zt = z_of_t_raw(t)
     # 如果超出边界，限制到边界（你也可以选择反射或缩小振幅）
     return float(np.clip(zt, z_min, z_max))
@@ -61,8 +178,613 @@ def dipole_B_field_at_point(r_vec, r0_vec, m_vec):
     B = mu0_4pi * (3 * r_hat * m_dot_r / (r_norm**3) - m_vec / (r_norm**3))
     return B
 
+# 极短的“占位”箭头向量（场太弱或位于磁铁内部时使用）
+ARROW_STUB = np.array([0.0, 0.0, 0.0001])
+
+def dipole_B_field_batch(points, r0_vec, m_vec):
+    """批量版偶极子磁场：points 为 (N,3)，一次 NumPy 运算返回 (N,3) 的 B"""
+    r = np.asarray(points, dtype=float) - r0_vec
+    r_norm = np.linalg.norm(r, axis=1)
+    # 与单点版一致：离源点过近时磁场记为 0（inv = 0 即可让 B 为 0）
+    inv = np.zeros_like(r_norm)
+    np.divide(1.0, r_norm, out=inv, where=r_norm >= 1e-6)
+    r_hat = r * inv[:, None]
+    m_dot_r = r_hat @ m_vec
+    inv3 = inv**3
+    return mu0_4pi * (3 * r_hat * m_dot_r[:, None] - m_vec[None, :]) * inv3[:, None]
+
+def dipole_B_rz(rho, dz):
+    """z 轴偶极子在柱坐标下的磁场分量 (B_rho, B_z)，只依赖 rho 与 dz = z - zt"""
+    rho = np.asarray(rho, dtype=float)
+    dz = np.asarray(dz, dtype=float)
+    r2 = rho**2 + dz**2
+    inv5 = np.zeros_like(r2)
+    np.divide(1.0, r2**2.5, out=inv5, where=r2 >= 1e-12)
+    B_rho = mu0_4pi * dipole_magnitude * 3 * rho * dz * inv5
+    B_z = mu0_4pi * dipole_magnitude * (3 * dz**2 - r2) * inv5
+    return B_rho, B_z
+
+def cylinder_field_table():
+    """圆柱磁铁的 (rho, dz) 磁场表，范围覆盖整个坐标轴区域与磁铁全部运动范围（结果缓存）"""
+    global _cylinder_table
+    if _cylinder_table is None:
+        rho_max = np.sqrt(2.0)  # 坐标轴 x、y 范围 [-1, 1] 的对角
+        dz_max = L_coil/2 + 0.5 + max(abs(z_min), abs(z_max))
+        _cylinder_table = CylinderFieldTable(mag_radius, mag_height, dipole_magnitude,
+                                             rho_max, dz_max, mu0_4pi=mu0_4pi,
+                                             cache_dir=FIELD_CACHE_DIR)
+    return _cylinder_table
+
+def magnet_B_rz():
+    """当前 FIELD_MODEL 对应的二维磁场函数 (rho, dz) -> (B_rho, B_z)"""
+    if FIELD_MODEL == "cylinder":
+        return cylinder_field_table()
+    return dipole_B_rz
+
+def magnet_B_field_batch(points, r0_vec):
+    """当前 FIELD_MODEL 下磁铁（中心 r0_vec、磁矩沿 z）在 points (N,3) 处的磁场"""
+    if FIELD_MODEL != "cylinder":
+        return dipole_B_field_batch(points, r0_vec, np.array([0.0, 0.0, dipole_magnitude]))
+    r = np.asarray(points, dtype=float) - r0_vec
+    rho = np.hypot(r[:, 0], r[:, 1])
+    B_rho, B_z = cylinder_field_table()(rho, r[:, 2])
+    factor = np.zeros_like(rho)
+    np.divide(B_rho, rho, out=factor, where=rho > 1e-12)
+    return np.stack([r[:, 0] * factor, r[:, 1] * factor, B_z], axis=1)
+
+def extra_sources():
+    """EXTRA_MAGNETS 对应的磁场源集合（结果缓存，修改 EXTRA_MAGNETS 后需调用 update_derived_params）"""
+    global _extra_sources
+    if _extra_sources is None:
+        sources = FieldSources(mu0_4pi=mu0_4pi)
+        for position, moment in EXTRA_MAGNETS:
+            sources.add_dipoles(position, moment)
+        _extra_sources = sources
+    return _extra_sources
+
+def extra_B_field_batch(points):
+    """附加磁铁在 points (N,3) 处的合磁场（不随时间变化，可只算一次）"""
+    return extra_sources().field(points)
+
+def total_B_field_batch(points, r0_vec):
+    """运动磁铁与全部附加磁铁叠加后的磁场"""
+    B = magnet_B_field_batch(points, r0_vec)
+    if EXTRA_MAGNETS:
+        B = B + extra_B_field_batch(points)
+    return B
+
+class AxisymmetricFieldEvaluator:
+    """
+    利用 z 轴偶极子的轴对称性计算箭头磁场。
+    把箭头按圆环（相同的 rho 与 z）分组，每个圆环只算一次二维场 (B_rho, B_z)，
+    再按各点的方位角旋转回直角坐标。
+    """
+    def __init__(self, bases, decimals=9):
+        bases = np.asarray(bases, dtype=float).reshape(-1, 3)
+        rho = np.hypot(bases[:, 0], bases[:, 1])
+        keys = np.round(np.stack([rho, bases[:, 2]], axis=1), decimals)
+        rings, inverse = np.unique(keys, axis=0, return_inverse=True)
+        self.ring_rho = rings[:, 0]
+        self.ring_z = rings[:, 1]
+        self.inverse = inverse.reshape(-1)
+        # 轴上的点方位角无意义，B_rho 在那里本来就是 0
+        inv_rho = np.zeros_like(rho)
+        np.divide(1.0, rho, out=inv_rho, where=rho > 1e-12)
+        self.cos_phi = bases[:, 0] * inv_rho
+        self.sin_phi = bases[:, 1] * inv_rho
+
+    @property
+    def n_rings(self):
+        return len(self.ring_rho)
+
+    def __call__(self, zt, field_rz=None):
+        """返回所有箭头处的 B，形状 (N,3)；field_rz 默认取当前 FIELD_MODEL"""
+        field_rz = field_rz or magnet_B_rz()
+        B_rho, B_z = field_rz(self.ring_rho, self.ring_z - zt)
+        B_rho = B_rho[self.inverse]
+        return np.stack([B_rho * self.cos_phi, B_rho * self.sin_phi, B_z[self.inverse]], axis=1)
+
+def arrow_field_batch(bases, zt, evaluator=None, r0=None, background_B=None):
+    """
+    一次计算所有箭头的可视化数据（给定 evaluator 时按圆环复用磁场）。
+    r0 为磁铁位置向量，可传入每帧共享的那一个，省略时由 zt 生成；
+    background_B 为不随时间变化的附加磁场（附加磁铁），直接叠加。
+    返回 (B, B_norm, ends, cvals, inside)：
+    磁场 (N,3)、磁场大小 (N,)、箭头终点 (N,3)、颜色系数 (N,)、是否位于磁铁内部 (N,)
+    """
+    if r0 is None:
+        r0 = np.array([0.0, 0.0, zt])
+    if evaluator is not None:
+        B = evaluator(zt)
+    else:
+        B = magnet_B_field_batch(bases, r0)
+    if background_B is not None:
+        B = B + background_B
+    B_norm = np.linalg.norm(B, axis=1)
+
+    # 箭头点位随磁铁接近而进入磁铁内部，则缩短（避免可视化错误）
+    inside = np.linalg.norm(bases - r0, axis=1) < mag_radius + 0.02
+    weak = inside | (B_norm < 1e-6)
+
+    scale_len = np.maximum(ARROW_SCALE * np.cbrt(B_norm), MIN_ARROW_LEN)
+    factor = np.zeros_like(B_norm)
+    np.divide(scale_len, B_norm, out=factor, where=~weak)
+    vec = B * factor[:, None]
+    vec[weak] = ARROW_STUB
+    ends = bases + vec
+
+    cvals = np.clip(np.minimum(1.0, B_norm / 5.0), 0.0, 1.0)
+    return B, B_norm, ends, cvals, inside
+
+# ---------- 箭头采样 ----------
+def sampling_bounds():
+    """箭头采样区域：(x 半宽, y 半宽, z 下界, z 上界)"""
+    half = (R_coil_inner + coil_thickness) * 1.1
+    return half, half, -L_coil/2 - 0.2, L_coil/2 + 0.2
+
+def keep_arrow_mask(bases, z0):
+    """排除线圈实体壁内与初始磁铁内部的采样点"""
+    radial = np.hypot(bases[:, 0], bases[:, 1])
+    # 我们允许箭头位于内腔内（radial < R_coil_inner - small), 或者外部 (radial > R_coil_inner+coil_thickness + small)
+    in_wall = (R_coil_inner - 0.02 < radial) & (radial < (R_coil_inner + coil_thickness) + 0.02)
+    # 排除在磁铁内部（动态的，注意初始 z0 做近似）
+    in_magnet = np.linalg.norm(bases - np.array([0.0, 0.0, z0]), axis=1) < max(mag_radius, mag_height/2) + 0.03
+    return ~(in_wall | in_magnet)
+
+def grid_arrow_bases(z0):
+    """均匀 NX × NY × NZ 网格"""
+    hx, hy, z_lo, z_hi = sampling_bounds()
+    xs = np.linspace(-hx, hx, NX)
+    ys = np.linspace(-hy, hy, NY)
+    zs = np.linspace(z_lo, z_hi, NZ)
+    bases = np.stack(np.meshgrid(xs, ys, zs, indexing="ij"), axis=-1).reshape(-1, 3)
+    return bases[keep_arrow_mask(bases, z0)]
+
+def field_gradient_estimate(points):
+    """
+    磁铁在 [z_min, z_max] 内运动时各点磁场的相对梯度 |∇B|/|B| ≈ 3/d（偶极子），
+    d 为到磁铁运动线段的距离（不小于磁铁半径）
+    """
+    dz = points[:, 2] - np.clip(points[:, 2], z_min, z_max)
+    d = np.maximum(np.hypot(np.hypot(points[:, 0], points[:, 1]), dz), mag_radius)
+    return 3.0 / d
+
+def adaptive_arrow_bases(z0, budget=None):
+    """
+    八叉树自适应采样：从覆盖采样区域的近立方体单元出发，
+    反复把“单元尺寸 × 相对梯度”最大的单元一分为八，每个叶子在中心放一个箭头。
+    单元尺寸因此大致正比于到磁铁运动范围的距离：近处密、远处稀，
+    有效箭头（排除线圈壁和磁铁内部后）的数量不超过预算。
+    """
+    budget = budget or ARROW_BUDGET
+    hx, hy, z_lo, z_hi = sampling_bounds()
+    n_root = max(1, int(np.ceil((z_hi - z_lo) / (2 * hx))))
+    root_half = np.array([hx, hy, (z_hi - z_lo) / (2 * n_root)])
+    roots = np.array([[0.0, 0.0, z_lo + (2 * i + 1) * root_half[2]] for i in range(n_root)])
+    offsets = np.array([[sx, sy, sz] for sx in (-1, 1) for sy in (-1, 1) for sz in (-1, 1)], dtype=float)
+
+    def push(heap, centers, half, counter):
+        scores = np.max(half) * field_gradient_estimate(centers)
+        kept = keep_arrow_mask(centers, z0)
+        for c, sc, k in zip(centers, scores, kept):
+            heapq.heappush(heap, (-sc, counter, c, half, bool(k)))
+            counter += 1
+        return counter, int(kept.sum())
+
+    heap = []
+    counter, n_kept = push(heap, roots, root_half, 0)
+    while heap:
+        _, _, center, half, was_kept = heap[0]
+        children = center + offsets * (half / 2)
+        n_new = int(keep_arrow_mask(children, z0).sum())
+        if n_kept - was_kept + n_new > budget:
+            break
+        heapq.heappop(heap)
+        counter, _ = push(heap, children, half / 2, counter)
+        n_kept += n_new - was_kept
+
+    return np.array([item[2] for item in heap if item[4]]).reshape(-1, 3)
+
+def arrow_bases_for_scene(z0):
+    """按 SAMPLING_MODE 生成箭头位置"""
+    if SAMPLING_MODE == "adaptive":
+        return adaptive_arrow_bases(z0)
+    return grid_arrow_bases(z0)
+
+# ---------- 逐帧预计算（查表） ----------
+# 影响轨迹与箭头外观的全部参数，用于生成缓存键
+PHYSICS_PARAMS = ("L_coil", "R_coil_inner", "coil_thickness", "m_mag", "k_spring",
+                  "c_damp", "A0", "phi0", "z_eq", "t_total", "dipole_magnitude",
+                  "ARROW_SCALE", "MIN_ARROW_LEN", "mag_radius", "mag_height",
+                  "TRAJECTORY_BACKEND", "c_eddy", "restitution", "FIELD_MODEL",
+                  "EXTRA_MAGNETS")
+
+def field_table_key(bases, fps):
+    """参数 + 箭头位置 + 帧率 的哈希，作为预计算表的缓存键"""
+    h = hashlib.sha1()
+    h.update(repr([globals()[name] for name in PHYSICS_PARAMS] + [fps]).encode("utf-8"))
+    h.update(np.ascontiguousarray(bases, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+def precompute_field_table(bases, fps, cache_dir=None):
+    """
+    预计算每一帧的磁铁位置与所有箭头数据。
+    返回 (z_frames, table)：z_frames 形状 (F,)，table 形状 (F,N,4) 的 float32，
+    前三个分量为箭头终点，第四个为颜色系数（磁铁内部的箭头记为 -1）。
+    给定 cache_dir 时以参数哈希为键存成 .npy，之后以内存映射方式直接读取。
+    """
+    bases = np.asarray(bases, dtype=float).reshape(-1, 3)
+    if cache_dir:
+        key = field_table_key(bases, fps)
+        z_path = os.path.join(cache_dir, f"{key}_z.npy")
+        table_path = os.path.join(cache_dir, f"{key}_field.npy")
+        if os.path.exists(z_path) and os.path.exists(table_path):
+            return np.load(z_path), np.load(table_path, mmap_mode="r")
+
+    n_frames = int(np.ceil(t_total * fps)) + 1
+    times = np.arange(n_frames) / fps
+    z_frames = z_of_t_array(times).astype(np.float32)
+
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = table_path + ".tmp"
+        table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                          shape=(n_frames, len(bases), 4))
+    else:
+        table = np.empty((n_frames, len(bases), 4), dtype=np.float32)
+
+    evaluator = AxisymmetricFieldEvaluator(bases) if USE_AXISYMMETRY else None
+    background_B = extra_B_field_batch(bases) if EXTRA_MAGNETS else None
+    for k, zt in enumerate(z_frames):
+        _, _, ends, cvals, inside = arrow_field_batch(bases, float(zt), evaluator,
+                                                      background_B=background_B)
+        table[k, :, :3] = ends
+        table[k, :, 3] = np.where(inside, -1.0, cvals)
+
+    if cache_dir:
+        # 先写完再改名，避免中断后留下残缺的缓存
+        table.flush()
+        del table
+        os.replace(tmp_path, table_path)
+        np.save(z_path, z_frames)
+        table = np.load(table_path, mmap_mode="r")
+    return z_frames, table
+
+# ---------- 逐帧计时 ----------
+class FrameProfiler:
+    """
+    逐帧记录各阶段耗时：z_of_t（轨迹）、field（磁场）、geometry（更新几何）、
+    render（manim 自身的光栅化与写帧）以及 export（模拟数据导出），结束后给出 p50/p95/max 汇总。
+    一次性的准备工作（如预计算查表）记在 setup 里。
+    """
+    PHASES = ("z_of_t", "field", "geometry", "render", "export")
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.frames = []
+        self.setup = {}
+        self.current = None
+
+    def start_frame(self):
+        if self.enabled:
+            self.current = dict.fromkeys(self.PHASES, 0.0)
+            self.frames.append(self.current)
+
+    def phase(self, name):
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.current is not None:
+                self.current[name] += elapsed
+            else:
+                self.setup[name] = self.setup.get(name, 0.0) + elapsed
+
+    def wrap_renderer(self, renderer):
+        """给 renderer.render 套上计时（每帧调用一次）"""
+        if not self.enabled:
+            return
+        original = renderer.render
+
+        def timed_render(*args, **kwargs):
+            with self.phase("render"):
+                return original(*args, **kwargs)
+        renderer.render = timed_render
+
+    def summary(self):
+        """各阶段耗时（毫秒）：{phase: {"p50", "p95", "max", "total"}}"""
+        result = {}
+        for name in self.PHASES:
+            values = np.array([frame[name] for frame in self.frames]) * 1000.0
+            if len(values) == 0:
+                values = np.zeros(1)
+            result[name] = {
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+                "total": float(values.sum()),
+            }
+        return result
+
+    def report(self):
+        lines = [f"逐帧计时（{len(self.frames)} 帧，单位 ms）",
+                 f"{'阶段':<10}{'p50':>10}{'p95':>10}{'max':>10}{'合计':>12}"]
+        for name, st in self.summary().items():
+            lines.append(f"{name:<10}{st['p50']:>10.3f}{st['p95']:>10.3f}{st['max']:>10.3f}{st['total']:>12.1f}")
+        for name, seconds in self.setup.items():
+            lines.append(f"[准备] {name}: {seconds * 1000.0:.1f} ms")
+        return "\n".join(lines)
+
+# ---------- 流式导出 ----------
+class FFmpegFrameStream:
+    """
+    把渲染出的 RGBA 帧通过 stdin 管道写给一个 ffmpeg 进程编码。
+    内存中只保留当前一帧，磁盘上只有最终视频，适合长时间、高分辨率的衰减过程。
+    """
+    def __init__(self, path, width, height, fps, crf=None):
+        self.path = path
+        self.n_frames = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        command = [
+            FFMPEG_BINARY, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgba",
+            "-s", f"{width}x{height}", "-r", f"{fps:g}",
+            "-i", "-",
+            "-an", "-c:v", "libx264", "-pix_fmt", "yuv420p",
+            "-crf", str(STREAM_CRF if crf is None else crf),
+            path,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame, num_frames=1):
+        data = np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+        for _ in range(num_frames):
+            self.process.stdin.write(data)
+        self.n_frames += num_frames
+
+    def attach(self, renderer):
+        """在 renderer.add_frame 之后把同一帧送入管道"""
+        original = renderer.add_frame
+
+        def add_frame(frame, num_frames=1):
+            original(frame, num_frames)
+            if not renderer.skip_animations:
+                self.write(frame, num_frames)
+        renderer.add_frame = add_frame
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass  # ffmpeg 已提前退出，下面按退出码报错
+        code = self.process.wait()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg 退出码 {code}：{self.path}")
+        return self.path
+
+def stream_output_path(scene_name):
+    """流式导出的视频路径，与 manim 默认目录一致：media/videos/magnet_damped_field/<画质>/"""
+    quality_dir = f"{config.pixel_height}p{config.frame_rate:g}"
+    return os.path.join(config.media_dir, "videos", "magnet_damped_field", quality_dir,
+                        f"{scene_name}_stream.mp4")
+
+def close_outputs(stream, recorder, quiet=False):
+    """
+    结束流式导出与模拟数据导出。两者都会尝试关闭，之后抛出遇到的第一个错误；
+    quiet 时错误只写日志。
+    """
+    error = None
+    for name, done, output in (("流式导出", "流式导出完成", stream),
+                               ("模拟数据导出", "模拟数据已导出", recorder)):
+        if output is None:
+            continue
+        try:
+            logger.info(f"{done}：{output.close()}（{output.n_frames} 帧）")
+        except Exception as e:
+            logger.error(f"{name}收尾失败：{e}")
+            error = error or e
+    if error is not None and not quiet:
+        raise error
+
+# ---------- 每帧共享状态 ----------
+class FrameState:
+    """
+    每帧只采样一次的共享状态：时间、查表帧号、磁铁位置 zt 及其位置向量 r0。
+    所有逐帧更新都读取这里，不再各自调用 z_of_t 或新建位置数组。
+    """
+    def __init__(self, fps, z_frames=None):
+        self.fps = fps
+        self.z_frames = z_frames
+        self.t = 0.0
+        self.k = 0
+        self.zt = 0.0
+        self.r0 = np.zeros(3)
+
+    def advance(self, t):
+        self.t = t
+        self.k = int(round(t * self.fps))
+        if self.z_frames is not None:
+            self.k = min(self.k, len(self.z_frames) - 1)
+            self.zt = float(self.z_frames[self.k])
+        else:
+            # z_of_t 已把位置限制在内腔内
+            self.zt = z_of_t(t)
+        self.r0[2] = self.zt
+        return self
+
+# ---------- 单个 mobject 的箭头场 ----------
+class ArrowField(VGroup):
+    """
+    用少数几个 VMobject 画出全部箭头：按颜色分桶，每个桶里所有箭头的
+    贝塞尔控制点放在同一块连续的 points 数组中，每帧用 NumPy 整体原地更新，
+    不再为每个箭头单独调用 put_start_and_end_on / set_color。
+
+    ThreeDCamera 只对 shade_in_3d 的 mobject 按深度排序，桶是普通 VMobject，
+    因此全部箭头总是画在磁铁和线圈曲面之前，不会被它们遮挡。
+    depth_sort=True 时改为每个箭头一个 shade_in_3d 的 VMobject（控制点仍整体批量生成，
+    颜色只在所属桶变化时重设），相机逐个箭头按深度排序，代价是每帧要排序和绘制 N 个 mobject。
+    """
+    POINTS_PER_ARROW = 16  # 箭身 1 段 + 三角箭头 3 段，每段 4 个控制点
+
+    def __init__(self, n_color_bins=16, low_color=BLUE, high_color=RED,
+                 inactive_color=GREY, stroke_width=2, tip_length=0.08,
+                 tip_width=0.06, depth_sort=False, **kwargs):
+        super().__init__(**kwargs)
+        self.tip_length = tip_length
+        self.tip_width = tip_width
+        self.arrow_stroke_width = stroke_width
+        self.depth_sort = depth_sort
+        colors = [interpolate_color(low_color, high_color, a)
+                  for a in np.linspace(0.0, 1.0, n_color_bins)]
+        # 最后一个桶放磁铁内部（灰色）的箭头
+        colors.append(inactive_color)
+        self.colors = colors
+        if depth_sort:
+            # 每个箭头一个 mobject，数量在第一次 set_arrows 时确定
+            self.arrows = []
+            self.arrow_bucket = None
+        else:
+            self.buckets = [VMobject(stroke_color=c, stroke_width=stroke_width,
+                                     fill_color=c, fill_opacity=1.0)
+                            for c in colors]
+            self.add(*self.buckets)
+
+    def arrow_points(self, starts, ends):
+        """批量生成箭头的控制点，返回 (N,16,3)"""
+        vec = ends - starts
+        length = np.linalg.norm(vec, axis=1)
+        direction = np.zeros_like(vec)
+        np.divide(vec, length[:, None], out=direction, where=length[:, None] > 1e-12)
+
+        # 与箭头方向垂直的单位向量（方向接近 z 轴时改用 x 轴）
+        perp = np.cross(direction, OUT)
+        bad = np.linalg.norm(perp, axis=1) < 1e-6
+        perp[bad] = np.cross(direction[bad], RIGHT)
+        perp_norm = np.linalg.norm(perp, axis=1)
+        np.divide(perp, perp_norm[:, None], out=perp, where=perp_norm[:, None] > 1e-12)
+
+        # 短箭头的箭头部分按比例缩小
+        tip_len = np.minimum(self.tip_length, 0.5 * length)
+        half_width = 0.5 * self.tip_width * tip_len / self.tip_length
+        tip_base = ends - direction * tip_len[:, None]
+        left = tip_base + perp * half_width[:, None]
+        right = tip_base - perp * half_width[:, None]
+
+        def line(a, b):
+            d = b - a
+            return np.stack([a, a + d / 3, a + 2 * d / 3, b], axis=1)
+
+        return np.concatenate([line(starts, tip_base), line(left, ends),
+                               line(ends, right), line(right, left)], axis=1)
+
+    def set_arrows(self, starts, ends, cvals, inactive):
+        """按起点、终点、颜色系数（0~1）与“失效”掩码整体更新全部箭头"""
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        n_bins = len(self.colors) - 1
+        bucket = np.minimum((np.asarray(cvals) * (n_bins - 1) + 0.5).astype(int), n_bins - 1)
+        bucket = np.where(inactive, n_bins, np.maximum(bucket, 0))
+        if self.depth_sort:
+            return self._set_each_arrow(starts, ends, bucket)
+
+        order = np.argsort(bucket, kind="stable")
+        points = self.arrow_points(starts[order], ends[order]).reshape(-1, 3)
+        counts = np.bincount(bucket, minlength=n_bins + 1) * self.POINTS_PER_ARROW
+        chunks = np.split(points, np.cumsum(counts)[:-1])
+        for mob, chunk in zip(self.buckets, chunks):
+            if mob.points.shape == chunk.shape:
+                mob.points[:] = chunk
+            else:
+                mob.set_points(chunk)
+        return self
+
+    def _set_each_arrow(self, starts, ends, bucket):
+        points = self.arrow_points(starts, ends)
+        if len(self.arrows) != len(points):
+            self.remove(*self.arrows)
+            self.arrows = [VMobject(stroke_width=self.arrow_stroke_width, fill_opacity=1.0,
+                                    shade_in_3d=True)
+                           for _ in range(len(points))]
+            self.add(*self.arrows)
+            self.arrow_bucket = np.full(len(points), -1)
+        for mob, chunk in zip(self.arrows, points):
+            if mob.points.shape == chunk.shape:
+                mob.points[:] = chunk
+            else:
+                mob.set_points(chunk)
+        for i in np.nonzero(bucket != self.arrow_bucket)[0]:
+            self.arrows[i].set_color(self.colors[bucket[i]])
+        self.arrow_bucket = bucket
+        return self
+
+# ---------- 磁力线 ----------
+class FieldLines(VMobject):
+    """全部磁力线放在一个 VMobject 里：每条折线是一个子路径，控制点整体批量生成"""
+    def __init__(self, color=YELLOW, stroke_width=1.5, stroke_opacity=0.8, **kwargs):
+        super().__init__(stroke_color=color, stroke_width=stroke_width,
+                         stroke_opacity=stroke_opacity, fill_opacity=0.0, **kwargs)
+
+    def set_lines(self, lines, lengths):
+        """lines (S,L,3)，第 s 条线的前 lengths[s] 个点有效"""
+        a, b = lines[:, :-1], lines[:, 1:]
+        valid = np.arange(lines.shape[1] - 1)[None, :] < (lengths - 1)[:, None]
+        a, b = a[valid], b[valid]
+        d = b - a
+        points = np.stack([a, a + d / 3, a + 2 * d / 3, b], axis=1).reshape(-1, 3)
+        if self.points.shape == points.shape:
+            self.points[:] = points
+        else:
+            self.set_points(points)
+        return self
+
+def field_line_tracer():
+    """按场景尺寸配置磁力线追踪器：种子在磁铁北极附近，线进入磁铁或离开坐标轴范围后停止"""
+    lo = np.array([-1.0, -1.0, -L_coil/2 - 0.5])
+    hi = np.array([1.0, 1.0, L_coil/2 + 0.5])
+    return FieldLineTracer(
+        n_lines=FIELD_LINE_COUNT, seed_radius=0.8 * mag_radius, seed_offset=mag_height/2 + 0.02,
+        step=FIELD_LINE_STEP, max_steps=FIELD_LINE_MAX_STEPS, bounds=(lo, hi),
+        stop_radius=0.9 * max(mag_radius, mag_height/2),
+        center_range=((0.0, 0.0, z_min), (0.0, 0.0, z_max)))
+
+# ---------- 感应电动势曲线 ----------
+def coil_model():
+    """按当前参数构造线圈模型（匝的半径取线圈内外半径的平均值）；FIELD_MODEL 为 "cylinder" 时按圆柱磁铁的磁场积分磁通"""
+    if FIELD_MODEL != "cylinder":
+        return CoilModel(N_turns, L_coil, R_coil_inner + coil_thickness / 2,
+                         resistance=R_circuit, mu0_4pi=mu0_4pi)
+    # 单匝磁通表只建一次，直接用精确公式：磁场表的双线性插值会抹平磁铁侧面处 B_z 的跳变，
+    # 线圈中段的电动势误差可达几十个百分点
+    return CoilModel(N_turns, L_coil, R_coil_inner + coil_thickness / 2,
+                     resistance=R_circuit, mu0_4pi=mu0_4pi,
+                     field_rz=lambda rho, dz: cylinder_B_rz(rho, dz, mag_radius, mag_height,
+                                                            dipole_magnitude, mu0_4pi),
+                     dz_max=L_coil/2 + max(abs(z_min), abs(z_max)), radial_breaks=(mag_radius,))
+
+def emf_of_frames(fps):
+    """一次算出每一帧时刻的感应电动势，返回 (times, emf)"""
+    n_frames = int(np.ceil(t_total * fps)) + 1
+    times = np.arange(n_frames) / fps
+    result = coil_model().evaluate(z_of_t_array(times), v_of_t_array(times), dipole_magnitude)
+    return times, result["emf"]
+
 # ---------- Manim Scene ----------
 class MagnetInsideCoil(ThreeDScene):
+    def render(self, preview=False):
+        # 流式导出时关闭 manim 自己的分段视频与拼接；用 tempconfig 保证渲染结束后恢复，
+        # 不影响同一进程里之后的渲染（如参数扫描）
+        if not STREAM_FRAMES:
+            return super().render(preview)
+        with tempconfig({"write_to_movie": False}):
+            return super().render(preview)
+
     def construct(self):
         # 坐标轴与相机
         axes = ThreeDAxes(x_range=[-1,1,1], y_range=[-1,1,1],
@@ -90,80 +812,174 @@ class MagnetInsideCoil(ThreeDScene):
         fixed_label = Text("弹簧固定端", font_size=20).next_to(fixed_dot, RIGHT)
         self.add(fixed_dot, fixed_label)
 
+        # 附加的固定磁铁（N 极朝上为红色，朝下为蓝色）
+        for position, moment in EXTRA_MAGNETS:
+            extra = Cylinder(radius=mag_radius, height=mag_height, direction=UP,
+                             color=RED if moment[2] >= 0 else BLUE, fill_opacity=0.6)
+            extra.move_to(position)
+            self.add(extra)
+
         # 磁铁（圆柱），初始放在 z_of_t(0)，并保证在内腔内
         magnet = Cylinder(radius=mag_radius, height=mag_height, direction=UP,
                           color=RED, fill_opacity=0.95)
         z0 = z_of_t(0)
         magnet.move_to([0, 0, z0])
-        self.add(magnet)
 
         # 箭头网格：只在内腔与外部合理位置放置，避免放在线圈实体或磁铁内部
-        arrow_meta = []
-        xs = np.linspace(- (R_coil_inner + coil_thickness)*1.1, (R_coil_inner + coil_thickness)*1.1, NX)
-        ys = np.linspace(- (R_coil_inner + coil_thickness)*1.1, (R_coil_inner + coil_thickness)*1.1, NY)
-        zs = np.linspace(-L_coil/2 - 0.2, L_coil/2 + 0.2, NZ)
-
-        for xi in xs:
-            for yi in ys:
-                # 排除位于线圈实体壁（即 r between inner and outer within thickness region）
-                radial = np.hypot(xi, yi)
-                # 我们允许箭头位于内腔内（radial < R_coil_inner - small), 或者外部 (radial > R_coil_inner+coil_thickness + small)
-                # 但排除恰好在线圈材质区域内
-                if R_coil_inner - 0.02 < radial < (R_coil_inner + coil_thickness) + 0.02:
-                    continue
-                for zi in zs:
-                    base = np.array([xi, yi, zi])
-                    # 排除在磁铁内部（动态的，注意初始 z0 做近似）
-                    if np.linalg.norm(base - np.array([0.0, 0.0, z0])) < max(mag_radius, mag_height/2) + 0.03:
-                        continue
-                    arrow = Arrow(start=base, end=base + np.array([0.0,0.0,0.0001]), buff=0)
-                    self.add(arrow)
-                    arrow_meta.append((base, arrow))
-
-        # scene-level updater：只接受 dt
-        def scene_update(dt):
-            t = self.time
-            zt = z_of_t(t)
-            # 保证磁铁永远在内腔内（防止用户设置超大 A0）
-            zt = float(np.clip(zt, z_min, z_max))
-            magnet.move_to([0,0,zt])
-
-            m_vec = np.array([0.0, 0.0, dipole_magnitude])
-
-            for base, arrow in arrow_meta:
-                # 如果箭头点位随磁铁接近而进入磁铁内部，则缩短（避免可视化错误）
-                if np.linalg.norm(base - np.array([0.0,0.0,zt])) < mag_radius + 0.02:
-                    arrow.put_start_and_end_on(base, base + np.array([0.0,0.0,0.0001]))
-                    arrow.set_color(GREY)
-                    continue
-                B = dipole_B_field_at_point(base, np.array([0.0,0.0,zt]), m_vec)
-                B_norm = np.linalg.norm(B)
-                if B_norm < 1e-6:
-                    new_end = base + np.array([0.0,0.0,0.0001])
-                else:
-                    scale_len = ARROW_SCALE * (B_norm ** (1/3))
-                    scale_len = max(scale_len, MIN_ARROW_LEN)
-                    vec = (B / B_norm) * scale_len
-                    new_end = base + vec
-                arrow.put_start_and_end_on(base, new_end)
-                cval = np.clip(min(1.0, B_norm/5.0), 0.0, 1.0)
-                arrow.set_color(interpolate_color(BLUE, RED, cval))
-
-        # 注册 scene-level updater（保存引用便于移除）
-        self.add_updater(scene_update)
-
-        # magnet 的 mobject-updater（可用也可不用，这里用 scene_update 已直接 move_to）
-        def magnet_updater(mobj, dt):
-            # 直接把位置设定到解析解（确保与 scene_update 一致）
-            zt = z_of_t(self.time)
-            zt = float(np.clip(zt, z_min, z_max))
-            mobj.move_to([0,0,zt])
-        magnet.add_updater(magnet_updater)
-
-        # 小提示：把相机做一点慢旋转利于观察
-        self.begin_ambient_camera_rotation(rate=0.12)
-        self.wait(t_total)
-
-        # 渲染结束前移除 updaters
-        self.remove_updater(scene_update)
-        magnet.remove_updater(magnet_updater)
+        arrow_bases = arrow_bases_for_scene(z0)
+
+        # 全部箭头由一个 ArrowField 绘制
+        arrow_field = ArrowField(depth_sort=ARROW_DEPTH_SORT)
+        arrow_field.set_arrows(arrow_bases, arrow_bases + ARROW_STUB,
+                               np.zeros(len(arrow_bases)), np.zeros(len(arrow_bases), dtype=bool))
+
+        # 磁力线（可选）
+        show_arrows = FIELD_DISPLAY in ("arrows", "both")
+        show_lines = FIELD_DISPLAY in ("lines", "both")
+        field_lines = FieldLines()
+        tracer = field_line_tracer() if show_lines else None
+
+        # 每帧变化的部分（磁铁 + 箭头 + 磁力线）放在同一图层，由同一条逐帧流水线驱动
+        moving_layer = Group(magnet)
+        if show_arrows:
+            moving_layer.add(arrow_field)
+        if show_lines:
+            moving_layer.add(field_lines)
+        self.add(moving_layer)
+
+        # 逐帧计时（PROFILE_FRAMES 关闭时不产生开销）
+        self.profiler = profiler = FrameProfiler(enabled=PROFILE_FRAMES)
+        profiler.wrap_renderer(self.renderer)
+
+        # 轨迹与磁场完全由参数决定：按目标帧率一次算好，逐帧只查表
+        fps = config.frame_rate
+        if USE_FIELD_TABLE and show_arrows:
+            with profiler.phase("precompute"):
+                z_frames, field_table = precompute_field_table(arrow_bases, fps, FIELD_CACHE_DIR)
+            state = FrameState(fps, z_frames)
+        else:
+            evaluator = AxisymmetricFieldEvaluator(arrow_bases) if USE_AXISYMMETRY else None
+            background_B = extra_B_field_batch(arrow_bases) if EXTRA_MAGNETS else None
+            state = FrameState(fps)
+
+        # 模拟数据导出：目录名带参数哈希，同一组参数重复渲染会覆盖
+        recorder = None
+        if EXPORT_SIM_DATA:
+            export_evaluator = AxisymmetricFieldEvaluator(arrow_bases) if USE_AXISYMMETRY else None
+            export_background = extra_B_field_batch(arrow_bases) if EXTRA_MAGNETS else None
+            recorder = SimulationRecorder(
+                os.path.join(EXPORT_DIR, f"{type(self).__name__}_{field_table_key(arrow_bases, fps)}"),
+                arrow_bases, chunk_frames=EXPORT_CHUNK_FRAMES,
+                meta={"fps": fps, **{name: repr(globals()[name]) for name in PHYSICS_PARAMS}})
+
+        # 逐帧流水线：一次时间采样、一次轨迹求值，后续步骤共用同一个 state
+        def frame_pipeline(mobj, dt):
+            profiler.start_frame()
+            with profiler.phase("z_of_t"):
+                state.advance(self.time)
+            with profiler.phase("field"):
+                if show_arrows and USE_FIELD_TABLE:
+                    ends = field_table[state.k, :, :3]
+                    cvals = field_table[state.k, :, 3]
+                    inside = cvals < 0
+                elif show_arrows:
+                    # 所有箭头的磁场、终点与颜色一次性批量算出
+                    _, _, ends, cvals, inside = arrow_field_batch(
+                        arrow_bases, state.zt, evaluator, state.r0, background_B)
+                if show_lines:
+                    # 没有附加磁铁时场随磁铁整体平移，磁力线只需追踪一次
+                    lines, lengths = tracer.update(
+                        lambda p: total_B_field_batch(p, state.r0), state.r0,
+                        rigid=not EXTRA_MAGNETS)
+            with profiler.phase("geometry"):
+                magnet.move_to(state.r0)
+                if show_arrows:
+                    arrow_field.set_arrows(arrow_bases, ends, cvals, inside)
+                if show_lines:
+                    field_lines.set_lines(lines, lengths)
+            if recorder is not None:
+                with profiler.phase("export"):
+                    B, B_norm, _, _, _ = arrow_field_batch(arrow_bases, state.zt, export_evaluator,
+                                                           state.r0, export_background)
+                    recorder.record(state.t, state.zt, B, B_norm)
+
+        # 挂在运动图层上（而不是 scene 级 updater），manim 据此把它们视为每帧需要重绘的对象
+        moving_layer.add_updater(frame_pipeline)
+
+        # 感应电动势实时曲线：全部帧的 EMF 与屏幕坐标预先算好，逐帧只截取到当前帧
+        if EMF_PLOT:
+            with profiler.phase("emf"):
+                emf_times, emf = emf_of_frames(fps)
+            emf_max = max(float(np.abs(emf).max()), 1e-9)
+            emf_axes = Axes(x_range=[0, t_total, max(1.0, round(t_total / 4))],
+                            y_range=[-emf_max * 1.1, emf_max * 1.1, emf_max],
+                            x_length=3.6, y_length=2.0, tips=False,
+                            axis_config={"include_numbers": False, "stroke_width": 1.5})
+            emf_axes.to_corner(UR, buff=0.3)
+            emf_label = Text("感应电动势 EMF", font_size=18).next_to(emf_axes, UP, buff=0.1)
+            emf_points = np.array([emf_axes.c2p(t, e) for t, e in zip(emf_times, emf)])
+            emf_curve = VMobject(stroke_color=YELLOW, stroke_width=2)
+            emf_curve.set_points_as_corners(emf_points[:2])
+
+            def emf_updater(mobj, dt):
+                # 在 frame_pipeline 之后执行，直接使用本帧的 state
+                k = min(state.k, len(emf_points) - 1)
+                mobj.set_points_as_corners(emf_points[:max(k, 1) + 1])
+            emf_curve.add_updater(emf_updater)
+            self.add_fixed_in_frame_mobjects(emf_axes, emf_label, emf_curve)
+
+        # 流式导出：帧直接进 ffmpeg（manim 自己的分段视频已在 render 中关闭）
+        stream = None
+        if STREAM_FRAMES:
+            stream = FFmpegFrameStream(stream_output_path(type(self).__name__),
+                                       config.pixel_width, config.pixel_height, config.frame_rate)
+            stream.attach(self.renderer)
+
+        try:
+            if BACKGROUND_CACHE:
+                self.play_with_cached_background()
+            else:
+                # 小提示：把相机做一点慢旋转利于观察
+                self.begin_ambient_camera_rotation(rate=CAMERA_ROTATION_RATE)
+                self.wait(t_total)
+        except BaseException:
+            # 渲染本身已出错：收尾时的错误（如 ffmpeg 管道已断开）只记日志，让原始异常继续抛出
+            close_outputs(stream, recorder, quiet=True)
+            raise
+        close_outputs(stream, recorder)
+
+        # 渲染结束前移除 updater
+        moving_layer.remove_updater(frame_pipeline)
+        if EMF_PLOT:
+            emf_curve.remove_updater(emf_updater)
+
+        if PROFILE_FRAMES:
+            logger.info(profiler.report())
+
+    def play_with_cached_background(self):
+        """
+        分段固定相机播放：每段开始时把相机转到该段中点对应的角度（与环绕旋转速率一致），
+        段内相机不动。没有 updater 的背景 mobject 都加在运动图层之前，
+        manim 在每段开头把它们渲染成一张静态背景图，段内每帧只重绘运动图层。
+        """
+        n = max(1, int(CAMERA_POSES))
+        segment = t_total / n
+        theta0 = self.renderer.camera.get_theta()
+        for i in range(n):
+            theta = theta0 + CAMERA_ROTATION_RATE * (i + 0.5) * segment if n > 1 else theta0
+            self.set_camera_orientation(theta=theta)
+            self.wait(segment)
+
+if __name__ == "__main__":
+    # 长时间渲染入口，例如：python magnet_damped_field.py --stream -q h --t-total 300
+    import argparse
+    from sweep_render import QUALITIES
+    parser = argparse.ArgumentParser(description="渲染 MagnetInsideCoil")
+    parser.add_argument("--stream", action="store_true", help="帧直接通过管道送入 ffmpeg 编码")
+    parser.add_argument("-q", "--quality", default="l", choices=sorted(QUALITIES),
+                        help="画质：l/m/h/p/k（同 manim -q）")
+    parser.add_argument("--t-total", type=float, default=t_total, help="模拟时长（秒）")
+    args = parser.parse_args()
+    set_params(STREAM_FRAMES=args.stream, t_total=args.t_total)
+    with tempconfig({"quality": QUALITIES[args.quality], "input_file": os.path.abspath(__file__)}):
+        MagnetInsideCoil().render()
@@ -0,0 +1,108 @@
+# 文件: magnet_trajectory.py
+"""
+磁铁运动的数值积分后端（纯 NumPy，不依赖编译）：
+    m z'' = -k (z - z_eq) - (c_damp + c_eddy · f(z)) z'
+其中 f(z) 为线圈内涡流阻尼的位置分布；碰到 z_min / z_max 时按恢复系数硬墙反射。
+对一批初始条件同时用自适应 Dormand–Prince RK45 积分一次，之后逐帧只做三次 Hermite 插值。
+"""
+import numpy as np
+
+# Dormand–Prince 5(4) 系数
+_C = np.array([0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0])
+_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+_B5 = np.array([35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84, 0.0])
+_B4 = np.array([5179/57600, 0.0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+def eddy_damping_profile(z, L_coil, edge_width=None):
+    """涡流阻尼的位置分布：磁铁在线圈内部时约为 1，离开线圈两端后平滑衰减到 0"""
+    half = L_coil / 2
+    w = edge_width or 0.1 * L_coil
+    return 0.5 * (np.tanh((z + half) / w) - np.tanh((z - half) / w))
+
+class Trajectory:
+    """积分结果：步点上的 (t, z, v)，按需三次 Hermite 插值到任意时刻"""
+    def __init__(self, t, z, v):
+        self.t = t   # (S,)
+        self.z = z   # (S, B)
+        self.v = v   # (S, B)
+
+    def sample(self, times):
+        """返回 (z, v)，形状均为 (T, B)"""
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        times = np.clip(times, self.t[0], self.t[-1])
+        i = np.clip(np.searchsorted(self.t, times, side="right") - 1, 0, len(self.t) - 2)
+        h = (self.t[i + 1] - self.t[i])[:, None]
+        s = ((times - self.t[i]) / (self.t[i + 1] - self.t[i]))[:, None]
+        z0, z1 = self.z[i], self.z[i + 1]
+        v0, v1 = self.v[i], self.v[i + 1]
+        s2, s3 = s * s, s * s * s
+        z = ((2 * s3 - 3 * s2 + 1) * z0 + (s3 - 2 * s2 + s) * h * v0
+             + (-2 * s3 + 3 * s2) * z1 + (s3 - s2) * h * v1)
+        dz = ((6 * s2 - 6 * s) * z0 + (3 * s2 - 4 * s + 1) * h * v0
+              + (-6 * s2 + 6 * s) * z1 + (3 * s2 - 2 * s) * h * v1) / h
+        return z, dz
+
+    def __call__(self, times, index=0):
+        """第 index 条轨迹在 times 处的位置（标量输入返回标量）"""
+        z = self.sample(times)[0][:, index]
+        return z if np.ndim(times) else float(z[0])
+
+def integrate_batch(z0, v0, t_total, *, k_spring, m_mag, c_damp, z_eq, L_coil,
+                    z_min, z_max, c_eddy=0.0, restitution=1.0,
+                    rtol=1e-6, atol=1e-9, h_max=0.01):
+    """
+    对一批初始条件 (z0, v0)（形状 (B,)）积分到 t_total，返回 Trajectory。
+    整批共用一个自适应步长（取误差最大者）；h_max 限制步长，避免一步跨过墙壁。
+    """
+    y = np.stack([np.atleast_1d(np.asarray(z0, dtype=float)),
+                  np.atleast_1d(np.asarray(v0, dtype=float))], axis=1)
+
+    def rhs(state):
+        z, v = state[:, 0], state[:, 1]
+        c = c_damp + c_eddy * eddy_damping_profile(z, L_coil)
+        a = (-k_spring * (z - z_eq) - c * v) / m_mag
+        return np.stack([v, a], axis=1)
+
+    ts, zs, vs = [0.0], [y[:, 0].copy()], [y[:, 1].copy()]
+    t = 0.0
+    h = min(h_max, 1e-3)
+    k1 = rhs(y)
+    while t < t_total:
+        h = min(h, t_total - t)
+        ks = [k1]
+        for j in range(1, 7):
+            dy = sum(a * kj for a, kj in zip(_A[j], ks))
+            ks.append(rhs(y + h * dy))
+        y5 = y + h * sum(b * kj for b, kj in zip(_B5, ks))
+        y4 = y + h * sum(b * kj for b, kj in zip(_B4, ks))
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y5))
+        err = float(np.max(np.abs(y5 - y4) / scale))
+
+        if err <= 1.0:
+            t += h
+            y = y5
+            # 硬墙反射：越界部分镜像回来，速度反向并按恢复系数衰减
+            over = y[:, 0] > z_max
+            under = y[:, 0] < z_min
+            if over.any() or under.any():
+                y[over, 0] = 2 * z_max - y[over, 0]
+                y[under, 0] = 2 * z_min - y[under, 0]
+                y[over | under, 1] *= -restitution
+                k1 = rhs(y)
+            else:
+                k1 = ks[6]  # FSAL：最后一级即下一步的第一级
+            ts.append(t)
+            zs.append(y[:, 0].copy())
+            vs.append(y[:, 1].copy())
+        factor = 0.9 * (1.0 / err) ** 0.2 if err > 0 else 5.0
+        h = min(h_max, h * min(5.0, max(0.2, factor)))
+
+    return Trajectory(np.array(ts), np.array(zs), np.array(vs))
@@ -0,0 +1,111 @@
+# 文件: sim_export.py
+"""
+模拟数据导出：渲染时逐帧记录时间、磁铁位置与采样点处的磁场，
+每 chunk_frames 帧写一个压缩 .npz 分块，内存占用与总帧数无关。
+读取时把分块逐个合并成未压缩的 .npy（只做一次），再以内存映射方式打开，便于画图与批改脚本分析。
+
+目录结构：
+    meta.npz          不随时间变化的数据（采样点位置、帧率、参数说明）
+    chunk_00000.npz   t (F,)、z (F,)、B (F,N,3)、B_norm (F,N)
+    ...
+"""
+import glob
+import json
+import os
+
+import numpy as np
+
+FRAME_FIELDS = ("t", "z", "B", "B_norm")
+
+class SimulationRecorder:
+    """逐帧缓存，满 chunk_frames 帧即写出一个压缩分块"""
+    def __init__(self, directory, points, chunk_frames=256, meta=None):
+        self.directory = directory
+        self.chunk_frames = chunk_frames
+        self.n_chunks = 0
+        self.n_frames = 0
+        self._buffer = {name: [] for name in FRAME_FIELDS}
+        os.makedirs(directory, exist_ok=True)
+        # 旧的分块与合并结果都作废
+        for path in glob.glob(os.path.join(directory, "*.np[yz]")):
+            os.remove(path)
+        np.savez(os.path.join(directory, "meta.npz"),
+                 points=np.asarray(points, dtype=np.float32),
+                 meta=json.dumps(meta or {}, ensure_ascii=False))
+
+    def record(self, t, z, B, B_norm=None):
+        B = np.asarray(B, dtype=np.float32)
+        if B_norm is None:
+            B_norm = np.linalg.norm(B, axis=1)
+        self._buffer["t"].append(t)
+        self._buffer["z"].append(z)
+        self._buffer["B"].append(B)
+        self._buffer["B_norm"].append(np.asarray(B_norm, dtype=np.float32))
+        self.n_frames += 1
+        if len(self._buffer["t"]) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer["t"]:
+            return
+        path = os.path.join(self.directory, f"chunk_{self.n_chunks:05d}.npz")
+        np.savez_compressed(path,
+                            t=np.asarray(self._buffer["t"], dtype=np.float64),
+                            z=np.asarray(self._buffer["z"], dtype=np.float32),
+                            B=np.stack(self._buffer["B"]),
+                            B_norm=np.stack(self._buffer["B_norm"]))
+        self.n_chunks += 1
+        self._buffer = {name: [] for name in FRAME_FIELDS}
+
+    def close(self):
+        self.flush()
+        return self.directory
+
+def consolidate(directory):
+    """把全部分块依次写入未压缩的 <field>.npy（每次只读入一个分块）"""
+    chunks = sorted(glob.glob(os.path.join(directory, "chunk_*.npz")))
+    if not chunks:
+        raise FileNotFoundError(f"{directory} 中没有模拟数据分块")
+    sizes = []
+    for path in chunks:
+        with np.load(path) as data:
+            sizes.append(len(data["t"]))
+    total = sum(sizes)
+
+    outputs = {}
+    with np.load(chunks[0]) as first:
+        for name in FRAME_FIELDS:
+            shape = (total,) + first[name].shape[1:]
+            outputs[name] = np.lib.format.open_memmap(
+                os.path.join(directory, f"{name}.npy.tmp"), mode="w+",
+                dtype=first[name].dtype, shape=shape)
+    start = 0
+    for path, size in zip(chunks, sizes):
+        with np.load(path) as data:
+            for name in FRAME_FIELDS:
+                outputs[name][start:start + size] = data[name]
+        start += size
+    for array in outputs.values():
+        array.flush()
+    outputs.clear()
+    for name in FRAME_FIELDS:
+        tmp = os.path.join(directory, f"{name}.npy.tmp")
+        os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+
+def load_simulation(directory, mmap=True):
+    """
+    读取导出的模拟数据，返回 dict：points、meta 以及 t、z、B、B_norm。
+    首次读取（或分块比合并结果新）时先合并；mmap=True 时逐帧数组为只读内存映射。
+    """
+    chunks = glob.glob(os.path.join(directory, "chunk_*.npz"))
+    merged = [os.path.join(directory, f"{name}.npy") for name in FRAME_FIELDS]
+    newest_chunk = max((os.path.getmtime(p) for p in chunks), default=0.0)
+    if not all(os.path.exists(p) for p in merged) or \
+            min(os.path.getmtime(p) for p in merged) < newest_chunk:
+        consolidate(directory)
+
+    with np.load(os.path.join(directory, "meta.npz")) as meta:
+        result = {"points": meta["points"], "meta": json.loads(str(meta["meta"]))}
+    for name, path in zip(FRAME_FIELDS, merged):
+        result[name] = np.load(path, mmap_mode="r" if mmap else None)
+    return result
@@ -0,0 +1,118 @@
+# 文件: sweep_render.py
+"""
+参数扫描批量渲染：对参数网格中的每一组参数，在独立进程中渲染 MagnetInsideCoil，
+所有 CPU 核心并行，输出到 media/videos/magnet_damped_field/<画质>/ 下，文件名带参数标签。
+
+用法示例：
+    python sweep_render.py --param k_spring=10,20,40 --param c_damp=0.3,0.6 -q l
+    python sweep_render.py --grid sweep.json -j 8
+其中 sweep.json 形如 {"k_spring": [10, 20], "A0": [0.4, 0.6]}
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCENE_FILE = os.path.join(HERE, "magnet_damped_field.py")
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+QUALITIES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+def parse_value(text):
+    """把命令行里的取值转成数字（或保留为字符串）"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def expand_grid(grid):
+    """{"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]"""
+    names = list(grid)
+    values = [v if isinstance(v, list) else [v] for v in grid.values()]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+def param_tag(params):
+    """由参数生成文件名标签，例如 k_spring-20__c_damp-0.6"""
+    tag = "__".join(f"{name}-{value}" for name, value in params.items())
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in tag)
+
+def render_one(params, quality):
+    """在工作进程中渲染一组参数，返回 (参数, 视频路径, 耗时)"""
+    from manim import tempconfig
+    import magnet_damped_field as mdf
+
+    start = time.perf_counter()
+    mdf.set_params(**params)
+    options = {
+        "quality": quality,
+        "input_file": SCENE_FILE,
+        "media_dir": os.path.join(HERE, "media"),
+        "output_file": f"MagnetInsideCoil__{param_tag(params)}",
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }
+    with tempconfig(options):
+        scene = mdf.MagnetInsideCoil()
+        scene.render()
+        movie = str(scene.renderer.file_writer.movie_file_path)
+    return params, movie, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="MagnetInsideCoil 参数扫描批量渲染")
+    parser.add_argument("--param", action="append", default=[],
+                        help="参数及取值列表，例如 k_spring=10,20,40（可重复）")
+    parser.add_argument("--grid", help="JSON 文件：参数名 -> 取值列表")
+    parser.add_argument("-q", "--quality", default="l", choices=sorted(QUALITIES),
+                        help="画质：l/m/h/p/k（同 manim -q）")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="并行进程数（默认全部 CPU 核心）")
+    args = parser.parse_args()
+
+    grid = {}
+    if args.grid:
+        with open(args.grid, "r", encoding="utf-8") as f:
+            grid.update(json.load(f))
+    for item in args.param:
+        name, _, values = item.partition("=")
+        grid[name.strip()] = [parse_value(v) for v in values.split(",") if v.strip()]
+    if not grid:
+        parser.error("至少需要 --param 或 --grid")
+
+    param_sets = expand_grid(grid)
+    jobs = max(1, min(args.jobs or 1, len(param_sets)))
+    print(f"共 {len(param_sets)} 组参数，{jobs} 个进程并行渲染")
+
+    # 场景中的缓存目录等相对路径以本目录为准
+    os.chdir(HERE)
+    failed = 0
+    # manim / cairo 的全局状态不适合 fork，使用 spawn 启动干净的工作进程
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as pool:
+        futures = {pool.submit(render_one, params, QUALITIES[args.quality]): params
+                   for params in param_sets}
+        for future in as_completed(futures):
+            params = futures[future]
+            try:
+                _, movie, elapsed = future.result()
+                print(f"[完成] {param_tag(params)} ({elapsed:.1f}s) -> {movie}")
+            except Exception as e:
+                failed += 1
+                print(f"[失败] {param_tag(params)}: {e}")
+
+    print(f"全部结束：成功 {len(param_sets) - failed}，失败 {failed}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
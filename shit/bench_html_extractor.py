@@ -0,0 +1,100 @@
+# 文件: bench_html_extractor.py
+"""
+搜索结果页解析基准：对保存下来的搜索页比较旧的逐块正则解析与 html_extractor 一遍扫描的耗时，
+并打印两者各取到多少张完整卡片（有 UP主 和播放量）。
+
+用法示例：
+    python bench_html_extractor.py pages/*.html            # 保存的搜索页
+    python bench_html_extractor.py --cards 40 --repeat 200 # 不给文件时用生成的页面
+    python bench_html_extractor.py pages/*.html --limit 5  # 与监控里 max_results=5 一致
+"""
+import argparse
+import re
+import statistics
+import time
+
+from html_extractor import extract_video_cards
+
+def legacy_parse(html):
+    """旧版 parse_videos_from_html 的解析部分，只用于对比"""
+    video_pattern = r'<div class="bili-video-card"[^>]*>(.*?)</div>'
+    video_blocks = re.findall(video_pattern, html, re.DOTALL)
+    if not video_blocks:
+        video_pattern = r'<div class="video-item[^"]*"[^>]*>(.*?)</div>'
+        video_blocks = re.findall(video_pattern, html, re.DOTALL)
+    cards = []
+    for block in video_blocks:
+        title_match = re.search(r'title="([^"]*)"', block)
+        href_match = re.search(r'href="//([^"]*)"', block)
+        if not title_match or not href_match:
+            continue
+        bvid_match = re.search(r'/video/(BV[0-9A-Za-z]+)', href_match.group(1))
+        author_match = re.search(r'<span[^>]*class="[^"]*up-name[^"]*"[^>]*>([^<]+)</span>', block)
+        view_match = re.search(r'<span[^>]*class="[^"]*play-num[^"]*"[^>]*>([^<]+)</span>', block)
+        cards.append({
+            "title": title_match.group(1),
+            "href": href_match.group(1),
+            "bvid": bvid_match.group(1) if bvid_match else None,
+            "author": author_match.group(1) if author_match else None,
+            "view_text": view_match.group(1) if view_match else None,
+        })
+    return cards
+
+def synthetic_page(n_cards):
+    """生成与搜索页结构相近的页面：卡片内有多层嵌套 div，前后有大段脚本"""
+    script = "<script>window.__INITIAL_STATE__=" + "{\"k\":\"<div class='x'>\"}," * 2000 + "</script>"
+    cards = []
+    for i in range(n_cards):
+        cards.append(
+            f'<div class="bili-video-card" data-idx="{i}">'
+            f'<div class="bili-video-card__wrap">'
+            f'<a href="//www.bilibili.com/video/BV1xx411c7m{i % 10}" target="_blank">'
+            f'<div class="bili-video-card__image"><img src="//i0.hdslb.com/{i}.jpg"></div></a>'
+            f'<div class="bili-video-card__info">'
+            f'<h3 title="测试视频 {i} &amp; 教程">测试视频 {i}</h3>'
+            f'<span class="bili-video-card__info--up-name">UP主{i}</span>'
+            f'<span class="bili-video-card__stats--play-num">{i}.5万</span>'
+            f'</div></div></div>'
+        )
+    return "<html><head>" + script + "</head><body>" + "".join(cards) + script + "</body></html>"
+
+def time_parser(parse, html, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(html)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples)
+
+def complete(cards):
+    return sum(1 for c in cards if c["author"] and c["view_text"])
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索结果页解析基准")
+    parser.add_argument("pages", nargs="*", help="保存的搜索结果页 HTML 文件")
+    parser.add_argument("--cards", type=int, default=30, help="生成页面的卡片数（未给文件时）")
+    parser.add_argument("--repeat", type=int, default=50, help="每页重复解析次数")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="新版最多取的卡片数（监控里为 max_results，够数即停止扫描）")
+    args = parser.parse_args()
+
+    if args.pages:
+        documents = []
+        for path in args.pages:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                documents.append((path, f.read()))
+    else:
+        documents = [(f"<生成页面 {args.cards} 张卡片>", synthetic_page(args.cards))]
+
+    def extract(html):
+        return extract_video_cards(html, limit=args.limit)
+
+    print(f"{'页面':<32}{'大小KB':>8}{'旧版ms':>10}{'新版ms':>10}{'旧版完整':>10}{'新版完整':>10}")
+    for name, html in documents:
+        old_ms = time_parser(legacy_parse, html, args.repeat)
+        new_ms = time_parser(extract, html, args.repeat)
+        print(f"{name[-32:]:<32}{len(html) / 1024:>8.0f}{old_ms:>10.2f}{new_ms:>10.2f}"
+              f"{complete(legacy_parse(html)):>10}{complete(extract(html)):>10}")
+
+if __name__ == "__main__":
+    main()
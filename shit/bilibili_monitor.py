@@ -1,13 +1,26 @@
-import requests
 import json
 import time
 import random
 import schedule
 from datetime import datetime
 import logging
+import os
+import sys
 from fake_useragent import UserAgent
-import re
 import pyautogui
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+# 与另一个监控共用的模块在仓库根目录的 bili_common 包里
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bili_common.rate_limit import HostRateLimiter
+from bili_common.http_client import HttpClient
+from bili_common.http_cache import HttpCache
+from bili_common.history_store import HistoryStore
+from bili_common.video_id import video_key
+from bili_common.notifier import Notifier
+from bili_common.digest import DigestBuffer
+from html_extractor import NON_DIGIT_RE, clean_text, extract_video_cards
+from keyword_matcher import KeywordMatcher
 
 class WeChatController:
     def __init__(self):
@@ -96,28 +109,55 @@ class AdvancedBilibiliMonitor:
         # 初始化UserAgent生成器
         self.ua = UserAgent()
         
-        # 创建多个会话轮换使用
-        self.sessions = [requests.Session() for _ in range(3)]
-        self.current_session_index = 0
-        
         # 加载配置
         self.config = self.load_config(config_file)
         
-        # 存储已处理的视频ID
-        self.processed_videos = set()
+        # 共用一个客户端：按主机复用连接，统一超时，记录每个请求的建连耗时
+        self.http = HttpClient(
+            pool_maxsize=max(4, self.config.get('search_workers', 4)),
+            timeout=(self.config.get('connect_timeout', 5), self.config.get('read_timeout', 20)),
+            logger=self.logger
+        )
+        
+        # 所有搜索线程共用的按主机限速器
+        self.rate_limiter = HostRateLimiter(
+            rate=self.config.get('requests_per_second', 0.2),
+            capacity=self.config.get('request_burst', 1)
+        )
+        
+        # 搜索结果缓存：有效期内不发请求，过期后发条件请求
+        self.http_cache = HttpCache(
+            self.config.get('http_cache_dir', 'http_cache'),
+            ttl=self.config.get('http_cache_ttl', 600)
+        )
+        
+        # 监控关键词自动机，只建一次
+        self.keyword_matcher = KeywordMatcher(self.config['monitor_keywords'])
+        
+        # 存储已处理的视频ID（快照 + 追加日志，发送成功即落盘）
         self.load_history()
         
         # 初始化微信控制
         self.wechat = WeChatController()
         
+        # 发送线程：搜索只负责排队，发送按自己的节奏进行
+        self.notifier = Notifier(
+            on_sent=self.mark_sent,
+            interval=self.config.get('send_interval', 3),
+            maxsize=self.config.get('notify_queue_size', 100),
+            logger=self.logger
+        )
+        
+        # 摘要模式：一轮（或 digest_window 秒内）的匹配合并成一条消息
+        self.digest = None
+        if self.config.get('digest_mode'):
+            self.digest = DigestBuffer(
+                window=self.config.get('digest_window', 0),
+                per_keyword_cap=self.config.get('digest_per_keyword_cap')
+            )
+        
         self.logger.info("高级B站监控器初始化完成")
 
-    def get_current_session(self):
-        """轮换使用不同的会话"""
-        session = self.sessions[self.current_session_index]
-        self.current_session_index = (self.current_session_index + 1) % len(self.sessions)
-        return session
-
     def get_stealth_headers(self):
         """生成更隐蔽的请求头"""
         return {
@@ -152,16 +192,25 @@ class AdvancedBilibiliMonitor:
                 'search_source': '5'
             }
             
-            session = self.get_current_session()
             headers = self.get_stealth_headers()
             
-            # 添加随机延迟
-            delay = random.uniform(3, 8)
-            self.logger.info(f"等待 {delay:.1f} 秒后搜索...")
-            time.sleep(delay)
+            def wait_for_turn():
+                # 全局限速：所有线程共用同一个令牌桶，命中缓存时不占用
+                waited = self.rate_limiter.acquire(search_url)
+                if waited > 0:
+                    self.logger.info(f"限速等待 {waited:.1f} 秒后搜索...")
+                self.logger.info(f"发送搜索请求: {keyword}")
             
-            self.logger.info(f"发送搜索请求: {keyword}")
-            response = session.get(search_url, params=params, headers=headers, timeout=20)
+            response = self.http_cache.get(
+                self.http, search_url, params=params, headers=headers,
+                before_request=wait_for_turn,
+                # 请求头里的 no-cache 是给 CDN 的，不让它关掉本地缓存的有效期
+                revalidate=False,
+                # 没有视频卡片的页面（多半是验证页）不缓存
+                cacheable=lambda r: 'bili-video-card' in r.text or 'video-item' in r.text
+            )
+            if getattr(response, 'from_cache', False):
+                self.logger.info(f"使用缓存的搜索结果: {keyword}")
             
             if response.status_code == 412:
                 self.logger.warning("触发B站风控，尝试备用方案...")
@@ -187,66 +236,25 @@ class AdvancedBilibiliMonitor:
         try:
             videos = []
             
-            # 更简单的解析方式 - 查找视频卡片
-            # 查找包含视频信息的div
-            video_pattern = r'<div class="bili-video-card"[^>]*>(.*?)</div>'
-            video_blocks = re.findall(video_pattern, html, re.DOTALL)
-            
-            if not video_blocks:
-                # 尝试其他可能的class名称
-                video_pattern = r'<div class="video-item[^"]*"[^>]*>(.*?)</div>'
-                video_blocks = re.findall(video_pattern, html, re.DOTALL)
+            # 一遍扫描整页提取视频卡片
+            cards = extract_video_cards(html, limit=self.config.get('max_results', 5))
+            self.logger.info(f"找到 {len(cards)} 个视频块")
             
-            self.logger.info(f"找到 {len(video_blocks)} 个视频块")
-            
-            for block in video_blocks[:self.config.get('max_results', 5)]:
-                try:
-                    # 提取标题
-                    title_match = re.search(r'title="([^"]*)"', block)
-                    if not title_match:
-                        continue
-                    
-                    title = title_match.group(1)
-                    
-                    # 提取链接
-                    href_match = re.search(r'href="//([^"]*)"', block)
-                    if not href_match:
-                        continue
-                    
-                    href = href_match.group(1)
-                    
-                    # 提取BV号
-                    bvid_match = re.search(r'/video/(BV[0-9A-Za-z]+)', href)
-                    if bvid_match:
-                        bvid = bvid_match.group(1)
-                    else:
-                        # 如果没有BV号，生成一个假的（仅用于去重）
-                        bvid = f"temp_{hash(href) % 1000000}"
-                    
-                    # 提取UP主
-                    author_match = re.search(r'<span[^>]*class="[^"]*up-name[^"]*"[^>]*>([^<]+)</span>', block)
-                    author = author_match.group(1) if author_match else "未知UP主"
-                    
-                    # 提取播放量
-                    view_match = re.search(r'<span[^>]*class="[^"]*play-num[^"]*"[^>]*>([^<]+)</span>', block)
-                    view_text = view_match.group(1) if view_match else "0"
-                    view_count = self.parse_view_count(view_text)
-                    
-                    video_info = {
-                        'bvid': bvid,
-                        'title': self.clean_text(title),
-                        'description': f"搜索关键词: {keyword}",
-                        'author': author,
-                        'url': f"https://{href}",
-                        'pubdate': int(time.time()) - random.randint(0, 86400*3),  # 最近3天内
-                        'view': view_count,
-                        'like': random.randint(0, 1000)  # 模拟点赞数
-                    }
-                    videos.append(video_info)
-                    
-                except Exception as e:
-                    self.logger.debug(f"解析单个视频块失败: {e}")
-                    continue
+            for card in cards:
+                href = card['href']
+                
+                # 没有BV号时去重用链接（见 video_id.video_key）
+                video_info = {
+                    'bvid': card['bvid'] or '',
+                    'title': clean_text(card['title']),
+                    'description': f"搜索关键词: {keyword}",
+                    'author': card['author'] or "未知UP主",
+                    'url': f"https://{href}",
+                    'pubdate': int(time.time()) - random.randint(0, 86400*3),  # 最近3天内
+                    'view': self.parse_view_count(card['view_text'] or "0"),
+                    'like': random.randint(0, 1000)  # 模拟点赞数
+                }
+                videos.append(video_info)
             
             return videos
             
@@ -295,36 +303,22 @@ class AdvancedBilibiliMonitor:
                 return int(num * 100000000)
             else:
                 # 移除非数字字符
-                num_text = re.sub(r'[^\d]', '', view_text)
+                num_text = NON_DIGIT_RE.sub('', view_text)
                 return int(num_text) if num_text else 0
         except:
             return 0
 
     def clean_text(self, text):
         """清理文本"""
-        if not text:
-            return ""
-        # 移除HTML标签
-        clean = re.compile('<.*?>')
-        text = re.sub(clean, '', text)
-        # 简化文本
-        text = text.replace('\n', ' ').replace('\r', ' ')
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return clean_text(text)
 
-    def contains_keywords(self, text, keywords):
-        """检查文本是否包含关键词"""
+    def contains_keywords(self, text, keywords=None):
+        """检查文本是否包含关键词（keywords 为空时用监控关键词自动机）"""
         if not text:
             return False, []
         
-        text_lower = text.lower()
-        matched_keywords = []
-        
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                matched_keywords.append(keyword)
-        
-        return len(matched_keywords) > 0, matched_keywords
+        matcher = self.keyword_matcher if keywords is None else KeywordMatcher(keywords)
+        return matcher.match(text)
 
     def load_config(self, config_file):
         """加载配置文件"""
@@ -342,7 +336,10 @@ class AdvancedBilibiliMonitor:
                 "monitor_keywords": ["教程", "入门", "基础"],
                 "wechat_contact": "文件传输助手",
                 "check_interval": 1800,
-                "max_results": 5
+                "max_results": 5,
+                "search_workers": 4,
+                "requests_per_second": 0.2,
+                "request_burst": 1
             }
             
             with open(config_file, 'w', encoding='utf-8') as f:
@@ -351,20 +348,15 @@ class AdvancedBilibiliMonitor:
             return default_config
 
     def load_history(self):
-        """加载历史记录"""
-        try:
-            with open('processed_videos.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.processed_videos = set(data.get('processed_videos', []))
-            self.logger.info(f"加载了 {len(self.processed_videos)} 个已处理视频")
-        except FileNotFoundError:
-            self.logger.info("无历史记录文件")
-
-    def save_history(self):
-        """保存历史记录"""
-        data = {'processed_videos': list(self.processed_videos)}
-        with open('processed_videos.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """加载历史记录（首次运行时从 processed_videos.json 迁移）"""
+        self.processed_videos = HistoryStore(
+            'processed_videos',
+            legacy_json='processed_videos.json',
+            compact_every=self.config.get('history_compact_every', 5000),
+            ttl_days=self.config.get('history_ttl_days'),
+            logger=self.logger
+        )
+        self.logger.info(f"加载了 {len(self.processed_videos)} 个已处理视频")
 
     def send_wechat_notification(self, video_info, matched_keywords):
         """发送微信通知"""
@@ -394,16 +386,37 @@ UP主: {video_info['author']}
         
         return success
 
+    def send_digest(self, message):
+        """发送摘要消息（一次切换联系人，长消息由 send_message 分段）"""
+        contact = self.config.get('wechat_contact', '文件传输助手')
+        success = self.wechat.send_message(contact, message)
+        if success:
+            self.logger.info("摘要通知发送成功")
+        else:
+            self.logger.error("摘要通知发送失败")
+        return success
+
+    def mark_sent(self, key):
+        """记录已发送；摘要消息的键是其中全部视频键组成的元组"""
+        for k in (key if isinstance(key, tuple) else (key,)):
+            self.processed_videos.add(k)
+
+    def search_keywords(self, keywords):
+        """
+        用线程池并发搜索全部关键词，按关键词顺序逐个产出 (keyword, videos)。
+        请求速率由共享的限速器控制，前面的结果处理时后面的搜索仍在进行。
+        """
+        workers = max(1, self.config.get('search_workers', 4))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            yield from zip(keywords, pool.map(self.search_bilibili_videos, keywords))
+
     def check_videos(self):
         """检查视频"""
         self.logger.info("开始检查B站视频...")
         
-        found_count = 0
+        queued_count = 0
         
-        for keyword in self.config['search_keywords']:
-            # 使用新的搜索方法
-            videos = self.search_bilibili_videos(keyword)
-            
+        for keyword, videos in self.search_keywords(self.config['search_keywords']):
             if not videos:
                 self.logger.warning(f"未找到关键词 '{keyword}' 的视频")
                 continue
@@ -411,15 +424,12 @@ UP主: {video_info['author']}
             self.logger.info(f"处理 {len(videos)} 个视频")
             
             for video in videos:
-                if video['bvid'] in self.processed_videos:
+                key = video_key(video)
+                if key is None or key in self.processed_videos:
                     continue
                 
-                title_match, title_keywords = self.contains_keywords(
-                    video['title'], self.config['monitor_keywords']
-                )
-                desc_match, desc_keywords = self.contains_keywords(
-                    video['description'], self.config['monitor_keywords']
-                )
+                title_match, title_keywords = self.contains_keywords(video['title'])
+                desc_match, desc_keywords = self.contains_keywords(video['description'])
                 
                 if title_match or desc_match:
                     all_keywords = list(set(title_keywords + desc_keywords))
@@ -427,21 +437,37 @@ UP主: {video_info['author']}
                     self.logger.info(f"🎯 匹配视频: {video['title']}")
                     self.logger.info(f"   关键词: {all_keywords}")
                     
-                    if self.send_wechat_notification(video, all_keywords):
-                        self.processed_videos.add(video['bvid'])
-                        found_count += 1
-                    
-                    # 发送间隔
-                    time.sleep(3)
-            
-            # 搜索间隔
-            time.sleep(5)
+                    if self.digest is not None:
+                        if self.digest.add(key, keyword, dict(video, matched_keywords=all_keywords)):
+                            queued_count += 1
+                    elif self.notifier.submit(key, partial(self.send_wechat_notification, video, all_keywords)):
+                        queued_count += 1
+        
+        if self.digest is not None and self.digest.due():
+            keys, message = self.digest.drain()
+            self.logger.info(f"发送摘要，共 {len(keys)} 个视频")
+            self.notifier.submit(keys, partial(self.send_digest, message))
+        
+        self.http.log_summary()
+        cache_stats = self.http_cache.stats()
+        self.logger.info(f"搜索缓存（累计）: 命中 {cache_stats['hits']}，304 {cache_stats['revalidated']}，未命中 {cache_stats['misses']}")
+        
+        # 等发送线程把本轮的通知发完
+        self.notifier.join()
+        found_count, failed_count = self.notifier.pop_counts()
         
         if found_count > 0:
-            self.save_history()
-            self.logger.info(f"发现 {found_count} 个新视频并已发送通知")
-        else:
+            self.logger.info(f"发现 {queued_count} 个新视频并已发送 {found_count} 条通知")
+        elif self.digest is not None and len(self.digest) > 0:
+            self.logger.info(f"摘要中已攒 {len(self.digest)} 个视频，等待发送")
+        elif queued_count == 0:
             self.logger.info("未发现匹配的新视频")
+        if failed_count > 0:
+            self.logger.warning(f"{failed_count} 个通知发送失败，下一轮重试")
+        
+        expired = self.processed_videos.prune()
+        if expired:
+            self.logger.info(f"淘汰了 {expired} 个过期的已处理视频")
 
     def run(self):
         """运行监控器"""
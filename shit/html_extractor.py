@@ -0,0 +1,127 @@
+# 文件: html_extractor.py
+"""
+B站搜索结果页的视频卡片提取，全部正则预编译，文档从头到尾只扫一遍：
+卡片之外用一个正则直接跳到下一张卡片（<script>/<style> 整段跳过），
+卡片内部只数 div 的开闭来确定边界，卡片里有嵌套 div 时字段也不会被截断；
+再在卡片片段内各搜索一次标题、链接、UP主和播放量。
+"""
+import html
+import re
+
+# 标签里的属性部分（引号里的 > 不算），不含结尾的 >；展开写法，各分支互不重叠，失败时不会指数回溯
+ATTRS = r'[^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*'
+
+# 下一张卡片的开始标签，或需要整段跳过的 <script>/<style>
+NEXT_RE = re.compile(
+    r'<(?P<raw>script|style)\b'
+    r'|<div\b[^>]*?\bclass\s*=\s*["\']'
+    r'(?:(?P<primary>(?:[^"\']*?\s)?bili-video-card(?=[\s"\']))|(?P<fallback>video-item))'
+    r'[^"\']*["\']' + ATTRS + '>', re.I)
+RAW_TEXT_END_RE = {
+    "script": re.compile(r'</script\s*>', re.I),
+    "style": re.compile(r'</style\s*>', re.I),
+}
+DIV_RE = re.compile(r'<(/?)div\b' + ATTRS + '>', re.I)
+
+# 以属性名本身开头，正则引擎可以直接按字面量定位；前面不能紧跟字母或 -（排除 data-title 之类），
+# 用定长的后行断言在匹配到属性名之后再检查
+TITLE_RE = re.compile(r'title(?<![\w-]title)\s*=\s*"([^"]*)"')
+HREF_RE = re.compile(r'href(?<![\w-]href)\s*=\s*"//([^"]*)"')
+# class 含指定片段的 <span> 的内容，从标签开头匹配（由 _span_text 定位）
+SPAN_RE = {
+    token: re.compile(r'<span\b[^>]*?\bclass\s*=\s*"[^"]*?' + token + r'[^"]*"[^>]*>(.*?)</span>', re.S)
+    for token in ("up-name", "play-num")
+}
+BVID_RE = re.compile(r'/video/(BV[0-9A-Za-z]+)')
+
+TAG_STRIP_RE = re.compile(r'<[^>]*>')
+NON_DIGIT_RE = re.compile(r'[^\d]')
+
+def clean_text(text):
+    """去掉 HTML 标签，合并空白"""
+    if not text:
+        return ""
+    if '<' in text:
+        text = TAG_STRIP_RE.sub('', text)
+    return ' '.join(text.split())
+
+def _card_end(document, pos):
+    """从卡片开始标签之后数 div 开闭，返回与之配对的 </div> 的起点（未闭合则为文末）"""
+    depth = 1
+    for m in DIV_RE.finditer(document, pos):
+        if m.group(1):
+            depth -= 1
+            if depth == 0:
+                return m.start()
+        elif not m.group(0).endswith("/>"):
+            depth += 1
+    return len(document)
+
+def _span_text(block, token):
+    """
+    第一个 class 含 token 的 <span> 的内容（没有则为 None）。
+    先按字面量找 token，再从它所在标签的开头验证，不必在每个 <span> 处都试一遍正则
+    """
+    pattern = SPAN_RE[token]
+    pos = block.find(token)
+    while pos >= 0:
+        start = block.rfind('<', 0, pos)
+        if start >= 0:
+            m = pattern.match(block, start)
+            if m:
+                return m.group(1)
+        pos = block.find(token, pos + 1)
+    return None
+
+def _parse_card(block):
+    """从一张卡片的 HTML 片段中取字段；缺标题或链接返回 None"""
+    title = TITLE_RE.search(block)
+    href = HREF_RE.search(block)
+    if not title or not href:
+        return None
+    href = html.unescape(href.group(1))
+    bvid = BVID_RE.search(href)
+    author = _span_text(block, "up-name")
+    view = _span_text(block, "play-num")
+    return {
+        "title": html.unescape(title.group(1)),
+        "href": href,
+        "bvid": bvid.group(1) if bvid else None,
+        "author": html.unescape(clean_text(author)) if author is not None else None,
+        "view_text": html.unescape(clean_text(view)) if view is not None else None,
+    }
+
+def extract_video_cards(document, limit=None):
+    """
+    返回搜索页里的视频卡片列表，每项为 dict：
+    title、href（去掉开头的 //）、bvid（链接里没有则为 None）、author、view_text（缺失为 None）。
+    优先取 bili-video-card，页面里一张都没有时用 video-item；
+    limit 为最多返回的卡片数，bili-video-card 够数后立即停止扫描。
+    """
+    primary, fallback = [], []
+    pos = 0
+    while True:
+        m = NEXT_RE.search(document, pos)
+        if m is None:
+            break
+        if m.group("raw"):
+            raw_end = RAW_TEXT_END_RE[m.group("raw").lower()].search(document, m.end())
+            if raw_end is None:
+                break
+            pos = raw_end.end()
+            continue
+
+        end = _card_end(document, m.end())
+        card = _parse_card(document[m.end():end])
+        pos = end
+        if card is None:
+            continue
+        if m.group("primary") is not None:
+            primary.append(card)
+            if limit and len(primary) >= limit:
+                break
+        else:
+            fallback.append(card)
+
+    cards = primary or fallback
+    return cards[:limit] if limit else cards
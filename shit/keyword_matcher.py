@@ -0,0 +1,98 @@
+# 文件: keyword_matcher.py
+"""
+多关键词匹配：用全部关键词建一个 Aho–Corasick 自动机，对文本只扫一遍即可找出所有命中，
+耗时与文本长度和命中数成正比，与关键词个数无关。
+匹配前对文本和关键词逐字做 NFKC + casefold，全角/半角、大小写都视为相同，中文不受影响；
+命中位置按原文本的下标给出。
+"""
+import unicodedata
+
+def fold_char(ch):
+    return unicodedata.normalize("NFKC", ch).casefold()
+
+class KeywordMatcher:
+    """keywords 中的空串与折叠后重复的关键词会被忽略"""
+    def __init__(self, keywords):
+        self.keywords = []
+        self.goto = [{}]     # 每个状态的转移
+        self.fail = [0]
+        self.out = [[]]      # 每个状态命中的关键词下标（已并入失败链上的输出）
+        self.lengths = []    # 关键词折叠后的长度
+        seen = set()
+        for keyword in keywords:
+            folded = "".join(fold_char(ch) for ch in keyword)
+            if not folded or folded in seen:
+                continue
+            seen.add(folded)
+            self._insert(folded, len(self.keywords))
+            self.keywords.append(keyword)
+            self.lengths.append(len(folded))
+        self._build_fail_links()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _insert(self, folded, index):
+        state = 0
+        for ch in folded:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append(index)
+
+    def _build_fail_links(self):
+        """按层 BFS 求失败指针"""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def _fold(self, text):
+        """返回折叠后的字符序列，以及每个折叠字符对应的原文下标"""
+        if text.isascii():
+            return text.lower(), range(len(text))
+        folded = []
+        origin = []
+        for i, ch in enumerate(text):
+            f = ch.casefold() if ch.isascii() else fold_char(ch)
+            folded.extend(f)
+            origin.extend([i] * len(f))
+        return folded, origin
+
+    def _scan(self, text):
+        """依次产出 (start, end, 关键词下标)"""
+        if not text or not self.keywords:
+            return
+        folded, origin = self._fold(text)
+        goto, fail, out, lengths = self.goto, self.fail, self.out, self.lengths
+        state = 0
+        for j, ch in enumerate(folded):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in out[state]:
+                yield origin[j - lengths[index] + 1], origin[j] + 1, index
+
+    def finditer(self, text):
+        """依次产出 (start, end, keyword)，text[start:end] 为命中的原文（允许重叠）"""
+        for start, end, index in self._scan(text):
+            yield start, end, self.keywords[index]
+
+    def find_all(self, text):
+        return list(self.finditer(text))
+
+    def match(self, text):
+        """返回 (是否命中, 命中的关键词列表)，关键词按配置中的顺序、不重复"""
+        hit = sorted({index for _, _, index in self._scan(text)})
+        return len(hit) > 0, [self.keywords[index] for index in hit]
@@ -4,18 +4,30 @@
 ###3. 50行处需要需要填入一个没用的联系人
 ###4. 未完成品，仅能发送搜索框中出现的前几个视频
 ###
-import requests
 import json
 import time
 import random
 import schedule
 from datetime import datetime
 import logging
+import os
+import sys
 import pyautogui
 import re
 from urllib.parse import quote
 import webbrowser
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+# 与另一个监控共用的模块在仓库根目录的 bili_common 包里
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bili_common.rate_limit import HostRateLimiter
+from bili_common.http_client import HttpClient
+from bili_common.http_cache import HttpCache
+from bili_common.history_store import HistoryStore
+from bili_common.video_id import video_key
+from bili_common.notifier import Notifier
+from bili_common.digest import DigestBuffer
 
 class WeChatController:
     def __init__(self):
@@ -221,25 +233,56 @@ class SimpleBilibiliMonitor:
         # 加载配置
         self.config = self.load_config(config_file)
         
-        # 创建会话
-        self.session = requests.Session()
+        # 共用一个客户端：按主机复用连接，统一超时，记录每个请求的建连耗时
+        self.http = HttpClient(
+            pool_maxsize=max(4, self.config.get('search_workers', 4)),
+            timeout=(self.config.get('connect_timeout', 5), self.config.get('read_timeout', 15)),
+            logger=self.logger
+        )
+        
+        # 所有搜索线程共用的按主机限速器
+        self.rate_limiter = HostRateLimiter(
+            rate=self.config.get('requests_per_second', 0.3),
+            capacity=self.config.get('request_burst', 1)
+        )
+        
+        # 搜索结果缓存：有效期内不发请求，过期后发条件请求
+        self.http_cache = HttpCache(
+            self.config.get('http_cache_dir', 'http_cache'),
+            ttl=self.config.get('http_cache_ttl', 600)
+        )
         
         # 设置真实的浏览器头
-        self.session.headers.update({
+        self.http.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
             'Referer': 'https://www.bilibili.com/',
         })
         
-        # 存储已处理的视频ID
-        self.processed_videos = set()
+        # 存储已处理的视频ID（快照 + 追加日志，发送成功即落盘）
         self.load_history()
         
         # 初始化微信控制
         self.wechat = WeChatController()
         self.human = HumanSearcher(self.logger)
         
+        # 发送线程：搜索只负责排队，发送按自己的节奏进行
+        self.notifier = Notifier(
+            on_sent=self.mark_sent,
+            interval=lambda: random.uniform(3, 6),
+            maxsize=self.config.get('notify_queue_size', 100),
+            logger=self.logger
+        )
+        
+        # 摘要模式：一轮（或 digest_window 秒内）的视频合并成一条消息
+        self.digest = None
+        if self.config.get('digest_mode'):
+            self.digest = DigestBuffer(
+                window=self.config.get('digest_window', 0),
+                per_keyword_cap=self.config.get('digest_per_keyword_cap')
+            )
+        
         self.logger.info("简单B站监控器初始化完成")
 
     def load_config(self, config_file):
@@ -258,27 +301,24 @@ class SimpleBilibiliMonitor:
                 "check_interval": 1800,  # 30分钟检查一次
                 "send_count": 3,        # 每次发送3个视频
                 "max_retries": 3,        # 最大重试次数
-                "mode": "human"
+                "mode": "human",
+                "search_workers": 4,     # api 模式下并发搜索的线程数
+                "requests_per_second": 0.3
             }
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(default_config, f, ensure_ascii=False, indent=2)
             return default_config
 
     def load_history(self):
-        """加载历史记录"""
-        try:
-            with open('processed_videos.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.processed_videos = set(x for x in data.get('processed_videos', []) if x)
-            self.logger.info(f"加载了 {len(self.processed_videos)} 个已处理视频")
-        except:
-            self.processed_videos = set()
-
-    def save_history(self):
-        """保存历史记录"""
-        data = {'processed_videos': list(self.processed_videos)}
-        with open('processed_videos.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """加载历史记录（首次运行时从 processed_videos.json 迁移）"""
+        self.processed_videos = HistoryStore(
+            'processed_videos',
+            legacy_json='processed_videos.json',
+            compact_every=self.config.get('history_compact_every', 5000),
+            ttl_days=self.config.get('history_ttl_days'),
+            logger=self.logger
+        )
+        self.logger.info(f"加载了 {len(self.processed_videos)} 个已处理视频")
 
     def search_bilibili_direct(self, keyword, retry_count=0):
         """
@@ -303,10 +343,15 @@ class SimpleBilibiliMonitor:
                 'Referer': 'https://m.bilibili.com/',
             }
             
-            # 随机延迟
-            time.sleep(random.uniform(2, 5))
-            
-            response = self.session.get(url, params=params, headers=headers, timeout=15)
+            response = self.http_cache.get(
+                self.http, url, params=params, headers=headers,
+                # 全局限速：所有线程共用同一个令牌桶，命中缓存时不占用
+                before_request=lambda: self.rate_limiter.acquire(url),
+                # HTTP 200 但 code 非 0（风控等）的结果不缓存
+                cacheable=lambda r: r.json().get('code') == 0
+            )
+            if getattr(response, 'from_cache', False):
+                self.logger.info(f"使用缓存的搜索结果: {keyword}")
             
             if response.status_code == 412:
                 self.logger.warning("触发风控，等待后重试...")
@@ -414,59 +459,90 @@ class SimpleBilibiliMonitor:
         except:
             return str(duration)
 
+    def send_digest(self, message):
+        """发送摘要消息（一次切换联系人，长消息由 send_message 分段）"""
+        contact = self.config.get('wechat_contact', '文件传输助手')
+        return self.wechat.send_message(contact, message)
+
+    def mark_sent(self, key):
+        """记录已发送；摘要消息的键是其中全部视频键组成的元组"""
+        for k in (key if isinstance(key, tuple) else (key,)):
+            self.processed_videos.add(k)
+
+    def search_keywords(self, keywords):
+        """
+        依次产出 (keyword, videos)。
+        api 模式用线程池并发搜索，速率由共享限速器控制；human 模式要打开真实浏览器，仍逐个搜索。
+        """
+        if self.config.get('mode', 'human') == 'human':
+            for i, keyword in enumerate(keywords):
+                # 浏览器窗口会抢走微信的焦点，先等上一个关键词的消息发完
+                self.notifier.join()
+                # 关键词间间隔
+                if i > 0:
+                    time.sleep(random.uniform(5, 10))
+                yield keyword, self.human.search(keyword, self.config.get('send_count', 3))
+            return
+        workers = max(1, self.config.get('search_workers', 4))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            yield from zip(keywords, pool.map(self.search_bilibili_direct, keywords))
+
     def check_and_send_videos(self):
         """检查并发送视频"""
         self.logger.info("开始检查并发送视频...")
         
-        total_sent = 0
-        
-        for keyword in self.config['search_keywords']:
+        for keyword, videos in self.search_keywords(self.config['search_keywords']):
             self.logger.info(f"处理关键词: {keyword}")
             
-            if self.config.get('mode', 'human') == 'human':
-                videos = self.human.search(keyword, self.config.get('send_count', 3))
-            else:
-                videos = self.search_bilibili_direct(keyword)
-            
             if not videos:
                 self.logger.warning(f"未找到关键词 '{keyword}' 的视频")
                 continue
             
-            # 发送视频
-            sent_count = 0
+            # 交给发送线程
+            queued_count = 0
             for video in videos:
-                processed_key = video.get('bvid') or video.get('url') or ''
-                if processed_key in self.processed_videos:
+                processed_key = video_key(video)
+                if processed_key is None or processed_key in self.processed_videos:
                     self.logger.info(f"跳过已发送视频: {video['title'][:30]}...")
                     continue
                 
-                self.logger.info(f"发送视频: {video['title'][:40]}...")
-                
-                # 发送到微信
-                if self.send_video_to_wechat(video, keyword):
-                    if processed_key:
-                        self.processed_videos.add(processed_key)
-                    sent_count += 1
-                    total_sent += 1
-                    self.logger.info("✅ 视频发送成功")
-                else:
-                    self.logger.error("❌ 视频发送失败")
-                
-                # 发送间隔
-                time.sleep(random.uniform(3, 6))
+                if self.digest is not None:
+                    if self.digest.add(processed_key, keyword, video):
+                        queued_count += 1
+                elif self.notifier.submit(processed_key, partial(self.send_video_to_wechat, video, keyword)):
+                    self.logger.info(f"排队发送: {video['title'][:40]}...")
+                    queued_count += 1
             
-            self.logger.info(f"关键词 '{keyword}' 发送了 {sent_count} 个视频")
-            
-            # 关键词间间隔
-            if len(self.config['search_keywords']) > 1:
-                time.sleep(random.uniform(5, 10))
+            self.logger.info(f"关键词 '{keyword}' 排队了 {queued_count} 个视频，待发送 {self.notifier.backlog()} 个")
+        
+        digest_size = 0
+        if self.digest is not None and self.digest.due():
+            keys, message = self.digest.drain()
+            digest_size = len(keys)
+            self.logger.info(f"📋 发送摘要，共 {digest_size} 个视频")
+            self.notifier.submit(keys, partial(self.send_digest, message))
         
-        if total_sent > 0:
-            self.save_history()
+        self.http.log_summary()
+        cache_stats = self.http_cache.stats()
+        self.logger.info(f"搜索缓存（累计）: 命中 {cache_stats['hits']}，304 {cache_stats['revalidated']}，未命中 {cache_stats['misses']}")
+        
+        # 等发送线程把本轮的视频发完
+        self.notifier.join()
+        total_sent, total_failed = self.notifier.pop_counts()
+        if total_failed > 0:
+            self.logger.error(f"❌ 本轮 {total_failed} 个视频发送失败")
+        
+        if total_sent > 0 and digest_size:
+            self.logger.info(f"🎉 本轮摘要已发送，共 {digest_size} 个新视频")
+        elif total_sent > 0:
             self.logger.info(f"🎉 本轮共发送 {total_sent} 个新视频")
         else:
             self.logger.info("ℹ️  本轮没有新视频需要发送")
         
+        expired = self.processed_videos.prune()
+        if expired:
+            self.logger.info(f"淘汰了 {expired} 个过期的已处理视频")
+        
         self.logger.info("本轮检查完成")
 
     def run(self):